@@ -1,7 +1,11 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Query, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
 from uuid import UUID, uuid4
-import aiofiles
-from pathlib import Path
+import asyncio
+import hashlib
+import weakref
+from typing import BinaryIO, Optional
 from datetime import datetime
 
 from app.config import get_settings
@@ -15,19 +19,139 @@ from app.models.document import (
     ProcessingStatus,
 )
 from app.models.mindmap import MindMapNode
+from app.services.claude_service import STRUCTURE_TEXT_LIMIT
 from app.services.pdf_processor import PDFProcessor
-from app.services.mindmap_generator import MindMapGenerator, nodes_store, mindmap_store
+from app.services.mindmap_generator import (
+    MindMapGenerator,
+    nodes_store,
+    mindmap_store,
+    document_nodes_store,
+    drop_document_nodes,
+    invalidate_mindmap_payloads,
+    warm_mindmap_payloads,
+)
 from app.services.storage import get_storage, PersistedMindMap
 
 router = APIRouter()
 settings = get_settings()
 logger = get_logger(__name__)
+pdf_processor = PDFProcessor()
+mindmap_generator = MindMapGenerator()
+
+# In-memory storage for active documents, keyed by content hash
+# (replace with database in production)
+documents_store: dict[str, Document] = {}
+
+# Document ID -> content hash, for the routes addressed by document ID
+doc_id_to_hash: dict[UUID, str] = {}
+
+# Serializes multi-step mutations of the in-memory stores. Reads don't take
+# it: each individual dict operation is atomic on the event loop, and the
+# lock only matters where a mutation spans an await.
+_store_lock = asyncio.Lock()
+
+# Serializes file I/O for one document (writing its PDF, saving its mindmap,
+# deleting its folder) without holding _store_lock, so slow disk work for
+# one document doesn't hold up the others. Locks are dropped once unused.
+_content_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _content_lock(content_hash: str) -> asyncio.Lock:
+    """Get the file I/O lock for a document's content hash."""
+    lock = _content_locks.get(content_hash)
+    if lock is None:
+        lock = _content_locks[content_hash] = asyncio.Lock()
+    return lock
+
+
+# Batch converters for lists of models
+_document_list_adapter = TypeAdapter(list[DocumentListItem])
+_audit_list_adapter = TypeAdapter(list[AuditEntryResponse])
+_node_list_adapter = TypeAdapter(list[MindMapNode])
+
+# Size of the buffer uploads are hashed through: one 1 MiB buffer, filled
+# with readinto and reused for every chunk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_upload_sync(source: BinaryIO, hasher: "hashlib._Hash") -> int:
+    """
+    Hash an uploaded file, enforcing the upload size limit.
+
+    The upload is hashed before anything is written so that re-uploads of
+    an already stored document never touch the documents directory. Runs
+    in a worker thread so the whole pass costs a single thread hop.
+
+    Args:
+        source: The underlying file object of the upload
+        hasher: Hasher to update with the file contents
+
+    Returns:
+        The number of bytes read
+
+    Raises:
+        HTTPException: If the upload exceeds max_upload_size
+    """
+    # One reusable buffer filled with readinto, rather than a new bytes
+    # object per chunk
+    buf = bytearray(UPLOAD_CHUNK_SIZE)
+    view = memoryview(buf)
+    total_size = 0
+    while n := source.readinto(buf):
+        total_size += n
+        if total_size > settings.max_upload_size:
+            logger.warning("File too large: exceeded %s bytes", settings.max_upload_size)
+            raise HTTPException(status_code=413, detail="File too large")
+        hasher.update(view[:n])
+    return total_size
+
+
+def _register_document(document: Document) -> None:
+    """Add a document to the in-memory stores, replacing any previous record."""
+    previous = documents_store.get(document.content_hash)
+    if previous and previous.id != document.id:
+        doc_id_to_hash.pop(previous.id, None)
+    documents_store[document.content_hash] = document
+    doc_id_to_hash[document.id] = document.content_hash
 
-# In-memory storage for active documents (replace with database in production)
-documents_store: dict[UUID, Document] = {}
 
-# Track content_hash -> document_id mapping for loaded documents
-hash_to_doc_id: dict[str, UUID] = {}
+def _document_response(document: Document) -> DocumentResponse:
+    """Build the API response for a document."""
+    return DocumentResponse.model_validate(document, from_attributes=True)
+
+
+def _get_document_by_id(document_id: UUID) -> Optional[Document]:
+    """Look up an in-memory document by its document ID."""
+    content_hash = doc_id_to_hash.get(document_id)
+    return documents_store.get(content_hash) if content_hash else None
+
+
+def _restore_document(content_hash: str, mindmap: PersistedMindMap) -> Document:
+    """
+    Restore a persisted document and its mindmap into the in-memory stores.
+
+    Args:
+        content_hash: The document content hash
+        mindmap: The persisted mindmap data
+
+    Returns:
+        The registered document record
+    """
+    _restore_mindmap_from_storage(mindmap)
+
+    doc_id = UUID(mindmap.document_id)
+    document = Document(
+        id=doc_id,
+        content_hash=content_hash,
+        filename=f"{doc_id}.pdf",
+        original_filename=mindmap.original_filename,
+        file_path=str(get_storage().get_pdf_path(content_hash) or ""),
+        page_count=mindmap.page_count,
+        status=ProcessingStatus.COMPLETED,
+        processed_at=mindmap.last_modified_dt,
+    )
+    _register_document(document)
+    return document
 
 
 def _restore_mindmap_from_storage(mindmap: PersistedMindMap) -> str:
@@ -40,111 +164,99 @@ def _restore_mindmap_from_storage(mindmap: PersistedMindMap) -> str:
     Returns:
         The root node ID
     """
-    from app.models.mindmap import NodeType
-
-    # Clear any existing nodes for this document
     doc_id_str = mindmap.document_id
 
-    # Restore nodes to in-memory store
-    for node_data in mindmap.nodes:
-        # Convert string IDs back to UUIDs in the MindMapNode
-        node = MindMapNode(
-            id=UUID(node_data["id"]),
-            document_id=UUID(node_data["document_id"]),
-            parent_id=UUID(node_data["parent_id"]) if node_data.get("parent_id") else None,
-            title=node_data["title"],
-            summary=node_data["summary"],
-            full_content=node_data.get("full_content"),
-            node_type=NodeType(node_data["node_type"]),
-            depth=node_data["depth"],
-            children_ids=[UUID(cid) for cid in node_data.get("children_ids", [])],
-            key_concepts=node_data.get("key_concepts", []),
-            has_children=node_data.get("has_children", False),
-            page_start=node_data.get("page_start"),
-            page_end=node_data.get("page_end"),
-            position_x=node_data.get("position_x", 0),
-            position_y=node_data.get("position_y", 0),
-        )
-        nodes_store[str(node.id)] = node
+    # Validate all persisted nodes in one pass and merge them into the store
+    nodes = _node_list_adapter.validate_python(mindmap.nodes)
+    node_ids = [node.id for node in nodes]
+    nodes_store.update(zip(node_ids, nodes))
+    document_nodes_store[doc_id_str] = node_ids
 
     # Restore document -> root mapping
     mindmap_store[doc_id_str] = mindmap.root_node_id
+    invalidate_mindmap_payloads(doc_id_str)
 
-    logger.info(f"Restored {len(mindmap.nodes)} nodes from storage for document {doc_id_str}")
+    logger.info("Restored %s nodes from storage for document %s", len(mindmap.nodes), doc_id_str)
 
     return mindmap.root_node_id
 
 
-async def process_document(document_id: UUID, content_hash: str):
+async def process_document(content_hash: str):
     """Background task to process uploaded document."""
-    logger.info(f"[{document_id}] Starting document processing")
-    document = documents_store.get(document_id)
+    document = documents_store.get(content_hash)
     if not document:
-        logger.error(f"[{document_id}] Document not found in store")
+        logger.error("[%s] Document not found in store", content_hash)
         return
 
+    document_id = document.id
+    logger.info("[%s] Starting document processing", document_id)
     storage = get_storage()
+    doc_id_str = str(document_id)
 
     try:
         document.status = ProcessingStatus.PROCESSING
-        logger.info(f"[{document_id}] Status changed to PROCESSING")
+        logger.info("[%s] Status changed to PROCESSING", document_id)
 
         # Extract text from PDF
-        logger.info(f"[{document_id}] Extracting text from PDF: {document.file_path}")
-        pdf_processor = PDFProcessor()
+        logger.info("[%s] Extracting text from PDF: %s", document_id, document.file_path)
         extracted_data = await pdf_processor.extract_text(document.file_path)
 
         document.page_count = extracted_data["page_count"]
-        logger.info(f"[{document_id}] Extracted {document.page_count} pages, {len(extracted_data['text'])} characters")
+        logger.info("[%s] Extracted %s pages, %s characters", document_id, document.page_count, len(extracted_data['text']))
+
+        # Claude only sees the leading window of text, so drop the rest and
+        # the per-page copies before the long-running API call
+        extracted_data = {"text": extracted_data["text"][:STRUCTURE_TEXT_LIMIT]}
 
         # Generate mind-map
-        logger.info(f"[{document_id}] Generating mind-map structure with Claude API")
-        generator = MindMapGenerator()
-        root_node_id = await generator.generate_mindmap(document_id, extracted_data)
-        logger.info(f"[{document_id}] Mind-map generated with root node: {root_node_id}")
-
-        # Save mindmap to storage
-        all_nodes = [node for node in nodes_store.values() if str(node.document_id) == str(document_id)]
-        storage.save_mindmap(
-            content_hash=content_hash,
-            document_id=str(document_id),
-            original_filename=document.original_filename,
-            page_count=document.page_count,
-            root_node_id=root_node_id,
-            nodes=all_nodes,
-        )
-        logger.info(f"[{document_id}] Mindmap saved to storage with hash {content_hash}")
-
-        # Track hash -> doc_id mapping
-        hash_to_doc_id[content_hash] = document_id
-
-        document.status = ProcessingStatus.COMPLETED
-        document.processed_at = datetime.utcnow()
-        logger.info(f"[{document_id}] Status changed to COMPLETED")
+        logger.info("[%s] Generating mind-map structure with Claude API", document_id)
+        root_node_id = await mindmap_generator.generate_mindmap(document_id, extracted_data)
+        logger.info("[%s] Mind-map generated with root node: %s", document_id, root_node_id)
+
+        # The content lock keeps a delete from removing the folder mid-save
+        async with _content_lock(content_hash):
+            async with _store_lock:
+                # The document may have been deleted while it was being processed
+                if documents_store.get(content_hash) is not document:
+                    logger.info("[%s] Document was deleted during processing, discarding mind-map", document_id)
+                    drop_document_nodes(doc_id_str)
+                    return
+
+                all_nodes = [nodes_store[node_id] for node_id in document_nodes_store.get(doc_id_str, [])]
+
+            # Save mindmap to storage
+            await storage.asave_mindmap(
+                content_hash=content_hash,
+                document_id=doc_id_str,
+                original_filename=document.original_filename,
+                page_count=document.page_count,
+                root_node_id=root_node_id,
+                nodes=all_nodes,
+            )
+            logger.info("[%s] Mindmap saved to storage with hash %s", document_id, content_hash)
+
+            document.status = ProcessingStatus.COMPLETED
+            document.processed_at = datetime.utcnow()
+            logger.info("[%s] Status changed to COMPLETED", document_id)
+
+        # Serialize the mind-map now so the first fetch is a cache hit
+        warm_mindmap_payloads(doc_id_str)
 
     except Exception as e:
         document.status = ProcessingStatus.FAILED
         document.error_message = str(e)
-        logger.exception(f"[{document_id}] Processing failed: {e}")
+        logger.exception("[%s] Processing failed: %s", document_id, e)
 
 
 @router.get("/", response_model=list[DocumentListItem])
 async def list_documents():
     """List all persisted documents."""
     storage = get_storage()
-    documents = storage.list_documents()
+    documents = await asyncio.to_thread(storage.list_documents)
 
-    return [
-        DocumentListItem(
-            content_hash=doc.content_hash,
-            document_id=doc.document_id,
-            original_filename=doc.original_filename,
-            page_count=doc.page_count,
-            created_at=doc.created_at,
-            last_modified=doc.last_modified,
-        )
-        for doc in documents
-    ]
+    # Convert the whole list in one pydantic-core call and encode it directly
+    items = _document_list_adapter.validate_python(documents, from_attributes=True)
+    return Response(content=_document_list_adapter.dump_json(items), media_type="application/json")
 
 
 @router.get("/{content_hash}/load", response_model=DocumentResponse)
@@ -164,34 +276,12 @@ async def load_document(content_hash: str):
     if not mindmap:
         raise HTTPException(status_code=500, detail="Failed to load mindmap")
 
-    # Restore to in-memory stores
-    _restore_mindmap_from_storage(mindmap)
+    async with _store_lock:
+        document = _restore_document(content_hash, mindmap)
 
-    # Create/update document record
-    doc_id = UUID(mindmap.document_id)
-    document = Document(
-        id=doc_id,
-        filename=f"{doc_id}.pdf",
-        original_filename=mindmap.original_filename,
-        file_path=str(storage.get_pdf_path(content_hash) or ""),
-        page_count=mindmap.page_count,
-        status=ProcessingStatus.COMPLETED,
-        processed_at=datetime.fromisoformat(mindmap.last_modified),
-    )
-    documents_store[doc_id] = document
-    hash_to_doc_id[content_hash] = doc_id
-
-    logger.info(f"Loaded document {doc_id} from storage (hash: {content_hash})")
-
-    return DocumentResponse(
-        id=document.id,
-        filename=document.filename,
-        original_filename=document.original_filename,
-        page_count=document.page_count,
-        status=document.status,
-        created_at=document.created_at,
-        processed_at=document.processed_at,
-    )
+    logger.info("Loaded document %s from storage (hash: %s)", document.id, content_hash)
+
+    return _document_response(document)
 
 
 @router.post("/upload", response_model=DocumentResponse)
@@ -200,150 +290,124 @@ async def upload_document(
     file: UploadFile = File(...),
 ):
     """Upload a PDF document for processing."""
-    logger.info(f"Upload request received: {file.filename}")
+    logger.info("Upload request received: %s", file.filename)
 
     if not file.filename or not file.filename.lower().endswith(".pdf"):
-        logger.warning(f"Rejected non-PDF file: {file.filename}")
+        logger.warning("Rejected non-PDF file: %s", file.filename)
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
 
     storage = get_storage()
 
-    # Save to temp location first to compute hash
-    temp_doc_id = uuid4()
-    temp_filename = f"{temp_doc_id}.pdf"
-    temp_file_path = settings.upload_dir / temp_filename
-
-    try:
-        async with aiofiles.open(temp_file_path, "wb") as f:
-            content = await file.read()
-            if len(content) > settings.max_upload_size:
-                logger.warning(f"File too large: {len(content)} bytes")
-                raise HTTPException(status_code=400, detail="File too large")
-            await f.write(content)
-        logger.info(f"Saved temp file: {temp_file_path} ({len(content)} bytes)")
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.exception(f"Failed to save temp file: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
-
-    # Compute content hash
-    content_hash = storage.compute_content_hash(temp_file_path)
-    logger.info(f"Content hash: {content_hash}")
-
-    # Check if document already exists
-    if storage.document_exists(content_hash):
-        logger.info(f"Document already exists with hash {content_hash}, loading from storage")
-
-        # Clean up temp file
-        temp_file_path.unlink(missing_ok=True)
-
-        # Load existing document
-        mindmap = storage.load_mindmap(content_hash)
-        if mindmap:
-            _restore_mindmap_from_storage(mindmap)
-
-            doc_id = UUID(mindmap.document_id)
+    # Hash the upload before persisting anything
+    hasher = storage.new_content_hasher()
+    total_size = await asyncio.to_thread(_hash_upload_sync, file.file, hasher)
+    content_hash = storage.content_hash_from_hasher(hasher)
+    logger.info("Content hash: %s (%s bytes)", content_hash, total_size)
+
+    async with _content_lock(content_hash):
+        async with _store_lock:
+            # The same content may already be uploaded and still processing
+            existing = documents_store.get(content_hash)
+            if existing and existing.status in (ProcessingStatus.PENDING, ProcessingStatus.PROCESSING):
+                logger.info("[%s] Document with hash %s is already being processed", existing.id, content_hash)
+                return _document_response(existing)
+
+            # Check if document already exists
+            if storage.document_exists(content_hash):
+                logger.info("Document already exists with hash %s, loading from storage", content_hash)
+
+                # Load existing document
+                mindmap = storage.load_mindmap(content_hash)
+                if mindmap:
+                    return _document_response(_restore_document(content_hash, mindmap))
+
+            # Reserve the hash with a pending record; the PDF is written below,
+            # outside the store lock
+            doc_id = uuid4()
             document = Document(
                 id=doc_id,
+                content_hash=content_hash,
                 filename=f"{doc_id}.pdf",
-                original_filename=mindmap.original_filename,
-                file_path=str(storage.get_pdf_path(content_hash) or ""),
-                page_count=mindmap.page_count,
-                status=ProcessingStatus.COMPLETED,
-                processed_at=datetime.fromisoformat(mindmap.last_modified),
+                original_filename=file.filename,
+                file_path=str(storage.pdf_path_for(content_hash)),
             )
-            documents_store[doc_id] = document
-            hash_to_doc_id[content_hash] = doc_id
+            _register_document(document)
 
-            return DocumentResponse(
-                id=document.id,
-                filename=document.filename,
-                original_filename=document.original_filename,
-                page_count=document.page_count,
-                status=document.status,
-                created_at=document.created_at,
-                processed_at=document.processed_at,
+        # Create document folder and write the PDF straight into it
+        try:
+            file.file.seek(0)
+            await asyncio.to_thread(
+                storage.create_document_folder_from_fileobj, content_hash, file.file
             )
+        except Exception as e:
+            logger.exception("Failed to save uploaded file: %s", e)
+            async with _store_lock:
+                if documents_store.get(content_hash) is document:
+                    documents_store.pop(content_hash)
+                    doc_id_to_hash.pop(doc_id, None)
+            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
 
-    # Create document folder and copy PDF
-    doc_id = uuid4()
-    storage.create_document_folder(content_hash, temp_file_path)
-
-    # Get the stored PDF path
-    stored_pdf_path = storage.get_pdf_path(content_hash)
-    if not stored_pdf_path:
-        stored_pdf_path = temp_file_path
-
-    # Clean up temp file if it was copied
-    if stored_pdf_path != temp_file_path:
-        temp_file_path.unlink(missing_ok=True)
-
-    # Create document record
-    document = Document(
-        id=doc_id,
-        filename=f"{doc_id}.pdf",
-        original_filename=file.filename,
-        file_path=str(stored_pdf_path),
-    )
-    documents_store[doc_id] = document
-    hash_to_doc_id[content_hash] = doc_id
-    logger.info(f"[{doc_id}] Document record created with status: {document.status}, hash: {content_hash}")
+    logger.info("[%s] Document record created with status: %s, hash: %s", doc_id, document.status, content_hash)
 
     # Start background processing
-    background_tasks.add_task(process_document, doc_id, content_hash)
-    logger.info(f"[{doc_id}] Background processing task scheduled")
-
-    return DocumentResponse(
-        id=document.id,
-        filename=document.filename,
-        original_filename=document.original_filename,
-        page_count=document.page_count,
-        status=document.status,
-        created_at=document.created_at,
-    )
+    background_tasks.add_task(process_document, content_hash)
+    logger.info("[%s] Background processing task scheduled", doc_id)
+
+    return _document_response(document)
 
 
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(document_id: UUID):
     """Get document details."""
-    document = documents_store.get(document_id)
+    document = _get_document_by_id(document_id)
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    return DocumentResponse(
-        id=document.id,
-        filename=document.filename,
-        original_filename=document.original_filename,
-        page_count=document.page_count,
-        status=document.status,
-        error_message=document.error_message,
-        created_at=document.created_at,
-        processed_at=document.processed_at,
-    )
+    return _document_response(document)
+
+
+def _status_etag(document: Document) -> str:
+    """Weak ETag that changes whenever the polled status fields change."""
+    error_digest = hashlib.blake2b(
+        (document.error_message or "").encode(), digest_size=8
+    ).hexdigest()
+    return f'W/"{document.status.value}-{error_digest}"'
 
 
 @router.get("/{document_id}/status", response_model=DocumentStatusResponse)
-async def get_document_status(document_id: UUID):
+async def get_document_status(document_id: UUID, request: Request):
     """Check document processing status."""
-    document = documents_store.get(document_id)
+    document = _get_document_by_id(document_id)
     if not document:
-        logger.warning(f"Status check for non-existent document: {document_id}")
+        logger.warning("Status check for non-existent document: %s", document_id)
         raise HTTPException(status_code=404, detail="Document not found")
 
-    logger.debug(f"[{document_id}] Status check: {document.status}")
-
-    return DocumentStatusResponse(
-        id=document.id,
-        status=document.status,
-        error_message=document.error_message,
+    logger.debug("[%s] Status check: %s", document_id, document.status)
+
+    # Polled continuously while processing. Clients revalidate every time
+    # (no-cache) and get an empty 304 while the status is unchanged.
+    etag = _status_etag(document)
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+
+    # Skip model validation and return the fields directly
+    return JSONResponse(
+        content={
+            "id": str(document.id),
+            "status": document.status.value,
+            "error_message": document.error_message,
+            "progress": None,
+        },
+        headers=headers,
     )
 
 
 @router.get("/{content_hash}/audit", response_model=list[AuditEntryResponse])
-async def get_audit_log(content_hash: str):
+async def get_audit_log(content_hash: str, limit: Optional[int] = Query(None, ge=1)):
     """
-    Get audit log for a document.
+    Get audit log for a document, optionally only the newest `limit` entries.
 
     Note: This endpoint is only available in DEBUG mode.
     """
@@ -355,16 +419,10 @@ async def get_audit_log(content_hash: str):
     if not storage.document_exists(content_hash):
         raise HTTPException(status_code=404, detail="Document not found")
 
-    entries = storage.get_audit_log(content_hash)
+    entries = storage.get_audit_log(content_hash, limit=limit)
 
-    return [
-        AuditEntryResponse(
-            timestamp=entry.timestamp,
-            action=entry.action,
-            details=entry.details,
-        )
-        for entry in entries
-    ]
+    items = _audit_list_adapter.validate_python(entries, from_attributes=True)
+    return Response(content=_audit_list_adapter.dump_json(items), media_type="application/json")
 
 
 @router.delete("/{content_hash}")
@@ -375,33 +433,18 @@ async def delete_document(content_hash: str):
     if not storage.document_exists(content_hash):
         raise HTTPException(status_code=404, detail="Document not found")
 
-    # Get the document ID if we have it
-    doc_id = hash_to_doc_id.get(content_hash)
-
-    # Remove from in-memory stores
-    if doc_id:
-        # Remove document record
-        documents_store.pop(doc_id, None)
-
-        # Remove nodes for this document
-        doc_id_str = str(doc_id)
-        nodes_to_remove = [
-            node_id for node_id, node in nodes_store.items()
-            if str(node.document_id) == doc_id_str
-        ]
-        for node_id in nodes_to_remove:
-            nodes_store.pop(node_id, None)
-
-        # Remove mindmap mapping
-        mindmap_store.pop(doc_id_str, None)
-
-        # Remove hash mapping
-        hash_to_doc_id.pop(content_hash, None)
+    async with _content_lock(content_hash):
+        async with _store_lock:
+            # Remove from in-memory stores if the document is loaded
+            document = documents_store.pop(content_hash, None)
+            if document:
+                doc_id_to_hash.pop(document.id, None)
+                drop_document_nodes(str(document.id))
 
-    # Delete from storage
-    if not storage.delete_document(content_hash):
-        raise HTTPException(status_code=500, detail="Failed to delete document")
+        # Delete from storage
+        if not storage.delete_document(content_hash):
+            raise HTTPException(status_code=500, detail="Failed to delete document")
 
-    logger.info(f"Deleted document with hash {content_hash}")
+    logger.info("Deleted document with hash %s", content_hash)
 
     return {"status": "deleted", "content_hash": content_hash}
@@ -1,15 +1,55 @@
+import io
+import re
 from fastapi import APIRouter, HTTPException
 from uuid import UUID
 
+from app.models.mindmap import MindMapNode
 from app.models.schemas import QARequest, QAResponse
 from app.services.qa_service import QAService
-from app.services.mindmap_generator import mindmap_store, nodes_store
+from app.services.mindmap_generator import mindmap_store, nodes_store, document_nodes_store
 from app.logging_config import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 qa_service = QAService()
 
+# Most nodes sent as context for whole-document questions
+MAX_CONTEXT_NODES = 20
+
+_WORD_RE = re.compile(r"\w{3,}")
+
+
+def _rank_by_relevance(question: str, nodes: list[MindMapNode]) -> list[MindMapNode]:
+    """
+    Order nodes by how many of the question's words they mention.
+
+    Only the title, summary and key concepts are scored so ranking stays
+    cheap. The sort is stable, so ties keep document order.
+    """
+    terms = set(_WORD_RE.findall(question.lower()))
+    if not terms:
+        return nodes
+
+    def score(node: MindMapNode) -> int:
+        text = " ".join((node.title, node.summary, *node.key_concepts)).lower()
+        return len(terms.intersection(_WORD_RE.findall(text)))
+
+    return sorted(nodes, key=score, reverse=True)
+
+
+def _build_context_text(nodes: list[MindMapNode]) -> str:
+    """Format nodes as markdown sections for the Q&A prompt."""
+    buf = io.StringIO()
+    write = buf.write
+    for i, node in enumerate(nodes):
+        if i:
+            write("\n\n")
+        write("## ")
+        write(node.title)
+        write("\n")
+        write(node.full_content or node.summary)
+    return buf.getvalue()
+
 
 @router.post("/{document_id}", response_model=QAResponse)
 async def ask_question(document_id: UUID, request: QARequest):
@@ -20,11 +60,11 @@ async def ask_question(document_id: UUID, request: QARequest):
     Optionally specify a context_node_id to focus the answer on a specific
     part of the document.
     """
-    logger.info(f"[{document_id}] Q&A request: '{request.question[:50]}...'")
+    logger.info("[%s] Q&A request: '%s...'", document_id, request.question[:50])
     doc_id_str = str(document_id)
 
     if doc_id_str not in mindmap_store:
-        logger.warning(f"[{document_id}] Document not found for Q&A")
+        logger.warning("[%s] Document not found for Q&A", document_id)
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Gather context from nodes
@@ -39,10 +79,9 @@ async def ask_question(document_id: UUID, request: QARequest):
             parent_nodes = []
             current = node
             while current.parent_id:
-                parent_id_str = str(current.parent_id)
-                if parent_id_str in nodes_store:
-                    parent_nodes.append(nodes_store[parent_id_str])
-                    current = nodes_store[parent_id_str]
+                if current.parent_id in nodes_store:
+                    parent_nodes.append(nodes_store[current.parent_id])
+                    current = nodes_store[current.parent_id]
                 else:
                     break
 
@@ -55,32 +94,28 @@ async def ask_question(document_id: UUID, request: QARequest):
 
             # Add children for more context
             for child_id in node.children_ids:
-                child_id_str = str(child_id)
-                if child_id_str in nodes_store:
-                    context_nodes.append(nodes_store[child_id_str])
+                if child_id in nodes_store:
+                    context_nodes.append(nodes_store[child_id])
     else:
-        # Use all nodes as context (for general questions)
-        root_id = mindmap_store[doc_id_str]
-
-        def collect_all_nodes(node_id: str):
-            if node_id in nodes_store:
-                context_nodes.append(nodes_store[node_id])
-                for child_id in nodes_store[node_id].children_ids:
-                    collect_all_nodes(str(child_id))
+        # Use all nodes as context (for general questions). The per-document
+        # index is already in document (depth-first) order, so no tree walk.
+        context_nodes = [
+            nodes_store[node_id]
+            for node_id in document_nodes_store.get(doc_id_str, [])
+            if node_id in nodes_store
+        ]
 
-        collect_all_nodes(root_id)
+        # Keep only the most relevant nodes to bound the prompt size
+        context_nodes = _rank_by_relevance(request.question, context_nodes)[:MAX_CONTEXT_NODES]
 
     if not context_nodes:
-        logger.warning(f"[{document_id}] No context nodes found")
+        logger.warning("[%s] No context nodes found", document_id)
         raise HTTPException(status_code=404, detail="No context available for this document")
 
     # Build context text
-    context_text = "\n\n".join([
-        f"## {node.title}\n{node.full_content or node.summary}"
-        for node in context_nodes
-    ])
+    context_text = _build_context_text(context_nodes)
 
-    logger.debug(f"[{document_id}] Using {len(context_nodes)} context nodes, {len(context_text)} chars")
+    logger.debug("[%s] Using %s context nodes, %s chars", document_id, len(context_nodes), len(context_text))
 
     # Get answer from QA service
     answer = await qa_service.answer_question(
@@ -88,10 +123,10 @@ async def ask_question(document_id: UUID, request: QARequest):
         context=context_text,
     )
 
-    logger.info(f"[{document_id}] Q&A completed with confidence: {answer['confidence']}")
+    logger.info("[%s] Q&A completed with confidence: %s", document_id, answer['confidence'])
     return QAResponse(
         answer=answer["answer"],
-        source_nodes=[str(n.id) for n in context_nodes[:5]],  # Top 5 relevant nodes
+        source_nodes=[n.id for n in context_nodes[:5]],  # Top 5 relevant nodes
         confidence=answer["confidence"],
     )
 
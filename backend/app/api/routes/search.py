@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException
 
-from app.models.schemas import WebSearchRequest, WebSearchResponse, WebSearchResult
+from app.models.schemas import WebSearchRequest, WebSearchResponse
 from app.services.web_search import WebSearchService
 from app.logging_config import get_logger
 
@@ -17,27 +17,18 @@ async def search_web(request: WebSearchRequest):
     This is useful for finding additional context about concepts
     mentioned in the document.
     """
-    logger.info(f"Web search request: '{request.query}' (max_results={request.max_results})")
+    logger.info("Web search request: '%s' (max_results=%s)", request.query, request.max_results)
     try:
         results = await search_service.search(
             query=request.query,
             max_results=request.max_results,
         )
 
-        logger.info(f"Web search completed: {len(results)} results")
-        return WebSearchResponse(
-            query=request.query,
-            results=[
-                WebSearchResult(
-                    title=r["title"],
-                    url=r["url"],
-                    snippet=r["snippet"],
-                )
-                for r in results
-            ],
-        )
+        logger.info("Web search completed: %s results", len(results))
+        # Validate the response and its results in one pydantic-core call
+        return WebSearchResponse.model_validate({"query": request.query, "results": results})
     except Exception as e:
-        logger.exception(f"Web search failed: {e}")
+        logger.exception("Web search failed: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Search failed: {str(e)}",
@@ -34,6 +34,14 @@ class Settings(BaseSettings):
     # Recommended: claude-haiku-4-5-20251001 (fastest and cheapest)
     claude_model_search: str = "claude-haiku-4-5-20251001"
 
+    # Cache of parsed Claude responses for repeated identical requests
+    claude_cache_size: int = 1024
+    claude_cache_ttl: int = 3600  # seconds
+
+    # Most concurrent outbound API calls, to stay under rate limits
+    claude_concurrency: int = 16
+    search_concurrency: int = 8
+
     # File storage
     upload_dir: Path = Path("uploads")
     documents_dir: Path = Path("documents")
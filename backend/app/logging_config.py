@@ -4,6 +4,15 @@ from app.config import get_settings
 
 settings = get_settings()
 
+# Records don't need thread, process or caller details (none are in the
+# format), so skip collecting them for every log call. Setting _srcfile to
+# None is the optimization the logging docs describe for skipping the
+# caller lookup.
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging._srcfile = None
+
 
 def setup_logging():
     """Configure application logging."""
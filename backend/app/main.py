@@ -5,29 +5,36 @@ from contextlib import asynccontextmanager
 from app.config import get_settings
 from app.logging_config import setup_logging, get_logger
 from app.api.routes import documents, mindmap, nodes, qa, search
+from app.services.claude_service import close_anthropic_client, get_claude_service
+from app.services.storage import close_storage
 
 settings = get_settings()
+
+# Configure logging at import so log lines emitted before startup are
+# formatted too
+setup_logging()
 logger = get_logger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Setup logging first
-    setup_logging()
     logger.info("Starting Claude Constitution Explorer API")
-    logger.info(f"Debug mode: {settings.debug}")
-    logger.info(f"Document model: {settings.claude_model_document}")
-    logger.info(f"Q&A model: {settings.claude_model_qa}")
-    logger.info(f"Search model: {settings.claude_model_search}")
+    logger.info("Debug mode: %s", settings.debug)
+    logger.info("Document model: %s", settings.claude_model_document)
+    logger.info("Q&A model: %s", settings.claude_model_qa)
+    logger.info("Search model: %s", settings.claude_model_search)
 
     # Startup: create upload directory
     settings.upload_dir.mkdir(parents=True, exist_ok=True)
-    logger.info(f"Upload directory: {settings.upload_dir.absolute()}")
+    logger.info("Upload directory: %s", settings.upload_dir.absolute())
 
     yield
 
     # Shutdown
     logger.info("Shutting down API")
+    await close_anthropic_client()
+    # Write out buffered audit entries rather than relying on atexit
+    close_storage()
 
 
 app = FastAPI(
@@ -63,4 +70,4 @@ app.include_router(
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "claude_cache": get_claude_service().cache_stats()}
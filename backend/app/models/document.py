@@ -14,6 +14,7 @@ class ProcessingStatus(str, Enum):
 
 class Document(BaseModel):
     id: UUID = Field(default_factory=uuid4)
+    content_hash: str
     filename: str
     original_filename: str
     file_path: str
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from uuid import UUID, uuid4
+from uuid import uuid4
 from typing import Optional
 from enum import Enum
 
@@ -12,16 +12,22 @@ class NodeType(str, Enum):
     DETAIL = "detail"
 
 
+def _new_node_id() -> str:
+    return str(uuid4())
+
+
 class MindMapNode(BaseModel):
-    id: UUID = Field(default_factory=uuid4)
-    document_id: UUID
-    parent_id: Optional[UUID] = None
+    # IDs are kept as strings: the stores, persisted JSON and API responses
+    # all use the string form, so no UUID <-> str conversion is needed.
+    id: str = Field(default_factory=_new_node_id)
+    document_id: str
+    parent_id: Optional[str] = None
     title: str
     summary: str  # Shown when collapsed
     full_content: Optional[str] = None  # Loaded on expansion
     node_type: NodeType
     depth: int
-    children_ids: list[UUID] = Field(default_factory=list)
+    children_ids: list[str] = Field(default_factory=list)
     key_concepts: list[str] = Field(default_factory=list)
     has_children: bool = False
     page_start: Optional[int] = None
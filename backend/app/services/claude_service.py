@@ -1,22 +1,151 @@
+import asyncio
+import hashlib
 import json
 import re
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
 import anthropic
+import httpx
+import orjson
+from cachetools import TTLCache
 from app.config import get_settings
 from app.logging_config import get_logger
 
 settings = get_settings()
 logger = get_logger(__name__)
 
+# Longest document text and Q&A context sent to Claude, in characters
+STRUCTURE_TEXT_LIMIT = 50000
+QA_CONTEXT_LIMIT = 30000
+
+_json_decoder = json.JSONDecoder()
+
+# Q&A reply format: "ANSWER: ... CONFIDENCE: 0.9" (confidence may be followed by text)
+_QA_RE = re.compile(r"ANSWER:\s*(.*?)\s*CONFIDENCE:\s*(\d+(?:\.\d+)?)", re.S)
+
+# Caps concurrent structure and Q&A calls; extra callers wait their turn
+_api_semaphore = asyncio.Semaphore(settings.claude_concurrency)
+
+
+@lru_cache
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """
+    Get the shared Anthropic client.
+
+    Every service uses this one client so API calls share a single
+    connection pool and keep-alive connections to the API.
+    """
+    # One keep-alive connection per call the API semaphores can let
+    # through, multiplexed over HTTP/2. Connecting fails fast; reads keep
+    # the SDK's long default since structure generation can take minutes.
+    max_in_flight = settings.claude_concurrency + settings.search_concurrency
+    http_client = anthropic.DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=max_in_flight,
+            max_keepalive_connections=max_in_flight,
+        ),
+    )
+    return anthropic.AsyncAnthropic(
+        api_key=settings.anthropic_api_key,
+        http_client=http_client,
+        timeout=anthropic.Timeout(600.0, connect=5.0),
+    )
+
+
+async def close_anthropic_client() -> None:
+    """Close the shared Anthropic client if it was created."""
+    if get_anthropic_client.cache_info().currsize:
+        await get_anthropic_client().close()
+        get_anthropic_client.cache_clear()
+
 
 class ClaudeService:
     """Wrapper for Claude API interactions."""
 
     def __init__(self):
-        # Use AsyncAnthropic for async operations
-        self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+        # Set only to override the shared client; see the client property
+        self._client: Optional[anthropic.AsyncAnthropic] = None
         self.model_document = settings.claude_model_document
         self.model_qa = settings.claude_model_qa
 
+        # Parsed responses keyed by a digest of model and prompt input.
+        # In-flight requests are tracked per key so identical concurrent
+        # calls share one API request.
+        self._cache: TTLCache = TTLCache(
+            maxsize=settings.claude_cache_size, ttl=settings.claude_cache_ttl
+        )
+        self._inflight: dict[str, asyncio.Lock] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    @property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """
+        The Anthropic client, looked up on each use.
+
+        The shared client is not held, so after close_anthropic_client() the
+        service picks up the next client instead of the closed one.
+        """
+        if self._client is not None:
+            return self._client
+        return get_anthropic_client()
+
+    @client.setter
+    def client(self, client) -> None:
+        """Use a specific client instead of the shared one."""
+        self._client = client
+
+    @staticmethod
+    def _cache_key(*parts: str) -> str:
+        """Digest the parts of a request into a cache key."""
+        return hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).hexdigest()
+
+    async def _cached(
+        self, key: str, compute: Callable[[], Awaitable[Optional[dict]]]
+    ) -> Optional[dict]:
+        """
+        Return the cached result for key, computing it at most once at a time.
+
+        Concurrent callers with the same key wait for the first caller's
+        request instead of sending their own. A result of None is not cached.
+        """
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache_hits += 1
+            return result
+
+        lock = self._inflight.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                result = self._cache.get(key)
+                if result is not None:
+                    self._cache_hits += 1
+                    return result
+
+                self._cache_misses += 1
+                result = await compute()
+                if result is not None:
+                    self._cache[key] = result
+                return result
+        finally:
+            if not lock.locked() and self._inflight.get(key) is lock:
+                del self._inflight[key]
+
+    def clear_cache(self) -> None:
+        """Drop all cached responses."""
+        self._cache.clear()
+
+    def cache_stats(self) -> dict:
+        """Report cache size and hit counts."""
+        return {
+            "size": len(self._cache),
+            "maxsize": self._cache.maxsize,
+            "hits": self._cache_hits,
+            "misses": self._cache_misses,
+        }
+
     async def generate_structure(self, document_text: str) -> dict:
         """
         Analyze document and generate hierarchical structure for mind-map.
@@ -24,7 +153,39 @@ class ClaudeService:
         Uses the document processing model configured in settings.
 
         Returns a nested structure representing the document's organization.
+        Results are cached per document text, so identical documents only
+        call the API once.
         """
+        # Truncate up front so the full text isn't held during the API call
+        document_text = document_text[:STRUCTURE_TEXT_LIMIT]
+        key = self._cache_key("structure", self.model_document, document_text)
+
+        try:
+            result = await self._cached(key, lambda: self._request_structure(document_text))
+        except anthropic.APIError as e:
+            logger.exception("Anthropic API error in generate_structure: %s", e)
+            return {
+                "title": "Error",
+                "summary": f"Failed to process document: {str(e)}",
+                "full_content": "",
+                "key_concepts": [],
+                "children": [],
+            }
+
+        if result is None:
+            # Fallback structure if parsing fails
+            logger.warning("Could not parse response as JSON, using fallback structure")
+            return {
+                "title": "Document",
+                "summary": "Document content",
+                "full_content": document_text[:1000],
+                "key_concepts": [],
+                "children": [],
+            }
+        return result
+
+    async def _request_structure(self, document_text: str) -> Optional[dict]:
+        """Ask Claude for the document structure; None if the reply isn't JSON."""
         system_prompt = """You are a document analysis expert. Your task is to analyze documents and create hierarchical structures suitable for mind-map visualizations.
 
 Always respond with valid JSON only, no additional text or markdown code blocks."""
@@ -62,73 +223,76 @@ Important:
 - Include page numbers if identifiable from the text
 
 Document text:
-{document_text[:50000]}"""
+{document_text}"""
 
-        try:
-            logger.info(f"Calling Claude API for structure generation (model: {self.model_document})")
-            logger.debug(f"Document text length: {len(document_text)} characters")
+        logger.info("Calling Claude API for structure generation (model: %s)", self.model_document)
+        logger.debug("Document text length: %s characters", len(document_text))
 
-            message = await self.client.messages.create(
+        # Streamed so a long generation keeps the connection active: the read
+        # timeout applies between chunks rather than to the whole reply
+        async with _api_semaphore:
+            async with self.client.messages.stream(
                 model=self.model_document,
                 max_tokens=8000,
                 system=system_prompt,
                 messages=[
                     {"role": "user", "content": user_prompt}
                 ],
-            )
+            ) as stream:
+                message = await stream.get_final_message()
 
-            # Extract JSON from response
-            response_text = message.content[0].text
-            logger.info(f"Claude API response received: {len(response_text)} characters")
-            logger.debug(f"API usage: input_tokens={message.usage.input_tokens}, output_tokens={message.usage.output_tokens}")
+        # Extract JSON from response
+        response_text = message.content[0].text
+        logger.info("Claude API response received: %s characters", len(response_text))
+        logger.debug("API usage: input_tokens=%s, output_tokens=%s", message.usage.input_tokens, message.usage.output_tokens)
+
+        # The reply is normally bare JSON, which orjson parses directly
+        try:
+            result = orjson.loads(response_text)
+        except orjson.JSONDecodeError:
+            logger.debug("Direct JSON parsing failed, trying to extract from markdown")
+        else:
+            if isinstance(result, dict):
+                logger.info("Successfully parsed JSON response: %s", result.get('title', 'Unknown'))
+                return result
 
-            # Try to parse JSON from the response
-            # First try direct parsing
+        # Otherwise parse the first JSON object in the response (it may be
+        # wrapped in markdown). raw_decode stops at the end of the object,
+        # so surrounding text is ignored.
+        start = response_text.find("{")
+        if start != -1:
             try:
-                result = json.loads(response_text)
-                logger.info(f"Successfully parsed JSON response: {result.get('title', 'Unknown')}")
+                result, _ = _json_decoder.raw_decode(response_text, start)
+                logger.info("Extracted JSON from markdown: %s", result.get('title', 'Unknown'))
                 return result
             except json.JSONDecodeError:
-                logger.debug("Direct JSON parsing failed, trying to extract from markdown")
-
-            # Try to find JSON in the response (may be wrapped in markdown)
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                try:
-                    result = json.loads(json_match.group())
-                    logger.info(f"Extracted JSON from markdown: {result.get('title', 'Unknown')}")
-                    return result
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse extracted JSON")
+                logger.warning("Failed to parse JSON from response")
 
-            # Fallback structure if parsing fails
-            logger.warning("Could not parse response as JSON, using fallback structure")
-            return {
-                "title": "Document",
-                "summary": "Document content",
-                "full_content": document_text[:1000],
-                "key_concepts": [],
-                "children": [],
-            }
-
-        except anthropic.APIError as e:
-            logger.exception(f"Anthropic API error in generate_structure: {e}")
-            return {
-                "title": "Error",
-                "summary": f"Failed to process document: {str(e)}",
-                "full_content": "",
-                "key_concepts": [],
-                "children": [],
-            }
+        return None
 
     async def answer_question(self, question: str, context: str) -> dict:
         """
         Answer a question based on the provided context.
 
-        Uses the Q&A model configured in settings.
+        Uses the Q&A model configured in settings. Answers are cached per
+        question and context.
 
         Returns the answer and a confidence score.
         """
+        context = context[:QA_CONTEXT_LIMIT]
+        key = self._cache_key("qa", self.model_qa, question, context)
+
+        try:
+            return await self._cached(key, lambda: self._request_answer(question, context))
+        except anthropic.APIError as e:
+            logger.exception("Anthropic API error in answer_question: %s", e)
+            return {
+                "answer": f"Sorry, I encountered an error while processing your question: {str(e)}",
+                "confidence": 0.0,
+            }
+
+    async def _request_answer(self, question: str, context: str) -> dict:
+        """Ask Claude to answer a question and parse the answer and confidence."""
         system_prompt = """You are a helpful assistant that answers questions based on provided document content.
 
 Always base your answers on the provided context. If the answer cannot be found in the context, clearly state that.
@@ -138,16 +302,16 @@ ANSWER: [Your detailed answer here]
 CONFIDENCE: [A number from 0.0 to 1.0]"""
 
         user_prompt = f"""Document content:
-{context[:30000]}
+{context}
 
 Question: {question}
 
 Provide a clear, accurate answer based only on the information in the document above."""
 
-        try:
-            logger.info(f"Calling Claude API for Q&A (model: {self.model_qa})")
-            logger.debug(f"Question: {question[:100]}...")
+        logger.info("Calling Claude API for Q&A (model: %s)", self.model_qa)
+        logger.debug("Question: %s...", question[:100])
 
+        async with _api_semaphore:
             message = await self.client.messages.create(
                 model=self.model_qa,
                 max_tokens=2000,
@@ -157,37 +321,30 @@ Provide a clear, accurate answer based only on the information in the document a
                 ],
             )
 
-            response_text = message.content[0].text
-            logger.info(f"Q&A response received: {len(response_text)} characters")
-            logger.debug(f"API usage: input_tokens={message.usage.input_tokens}, output_tokens={message.usage.output_tokens}")
-
-            # Parse response
-            answer = response_text
-            confidence = 0.8  # Default confidence
-
-            if "ANSWER:" in response_text:
-                parts = response_text.split("CONFIDENCE:")
-                answer = parts[0].replace("ANSWER:", "").strip()
-                if len(parts) > 1:
-                    try:
-                        # Extract the confidence number
-                        conf_str = parts[1].strip()
-                        # Handle cases like "0.9" or "0.9 - high confidence"
-                        conf_match = re.search(r'(\d+\.?\d*)', conf_str)
-                        if conf_match:
-                            confidence = float(conf_match.group(1))
-                    except ValueError:
-                        pass
-
-            logger.info(f"Q&A completed with confidence: {confidence}")
-            return {
-                "answer": answer,
-                "confidence": min(max(confidence, 0.0), 1.0),
-            }
-
-        except anthropic.APIError as e:
-            logger.exception(f"Anthropic API error in answer_question: {e}")
-            return {
-                "answer": f"Sorry, I encountered an error while processing your question: {str(e)}",
-                "confidence": 0.0,
-            }
+        response_text = message.content[0].text
+        logger.info("Q&A response received: %s characters", len(response_text))
+        logger.debug("API usage: input_tokens=%s, output_tokens=%s", message.usage.input_tokens, message.usage.output_tokens)
+
+        # Parse response
+        answer = response_text
+        confidence = 0.8  # Default confidence
+
+        match = _QA_RE.search(response_text)
+        if match:
+            answer = match.group(1)
+            confidence = float(match.group(2))
+        elif "ANSWER:" in response_text:
+            # Answer given without a usable confidence
+            answer = response_text.split("CONFIDENCE:")[0].replace("ANSWER:", "").strip()
+
+        logger.info("Q&A completed with confidence: %s", confidence)
+        return {
+            "answer": answer,
+            "confidence": min(max(confidence, 0.0), 1.0),
+        }
+
+
+@lru_cache
+def get_claude_service() -> ClaudeService:
+    """Get the shared ClaudeService instance."""
+    return ClaudeService()
@@ -1,8 +1,14 @@
-from uuid import UUID, uuid4
+import math
+import sys
+from collections import deque
+from functools import lru_cache
+from uuid import UUID
 from typing import Optional
 
+import orjson
+
 from app.models.mindmap import MindMapNode, NodeType
-from app.services.claude_service import ClaudeService
+from app.services.claude_service import get_claude_service
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -10,13 +16,148 @@ logger = get_logger(__name__)
 # In-memory storage for nodes (replace with database in production)
 nodes_store: dict[str, MindMapNode] = {}
 mindmap_store: dict[str, str] = {}  # document_id -> root_node_id
+document_nodes_store: dict[str, list[str]] = {}  # document_id -> node_ids, depth-first
+
+# Deepest mind-map payload built ahead of time (the frontend requests depth 2)
+PRECOMPUTED_MINDMAP_DEPTH = 2
+
+
+def _intern_concepts(concepts: list) -> list[str]:
+    """
+    Intern key concept strings.
+
+    Concepts repeat heavily across a document's nodes, so interning keeps one
+    copy of each string instead of one per node.
+    """
+    return [sys.intern(concept) for concept in concepts if isinstance(concept, str)]
+
+
+def _node_payload(node: MindMapNode, include_content: bool) -> dict:
+    """
+    Convert a node to its MindMapNodeResponse JSON form.
+
+    Built as a plain dict for orjson; the fields come from an already
+    validated MindMapNode, so no response model is constructed.
+    """
+    return {
+        "id": node.id,
+        "document_id": node.document_id,
+        "parent_id": node.parent_id,
+        "title": node.title,
+        "summary": node.summary,
+        "full_content": node.full_content if include_content else None,
+        "node_type": node.node_type,
+        "depth": node.depth,
+        "children_ids": node.children_ids,
+        "key_concepts": node.key_concepts,
+        "has_children": node.has_children,
+        "page_start": node.page_start,
+        "page_end": node.page_end,
+        "position_x": node.position_x,
+        "position_y": node.position_y,
+    }
+
+
+# document_id -> payload version, bumped whenever the document's nodes change.
+# The version is part of the payload cache key, so one document's changes
+# leave other documents' cached payloads alone.
+_payload_versions: dict[str, int] = {}
+
+
+def get_mindmap_payload(document_id: str, depth: int) -> bytes:
+    """
+    Get the JSON-encoded mind-map for a document down to the given depth.
+
+    Mind-maps don't change once generated, so the serialized response is
+    cached per (document_id, depth). Call invalidate_mindmap_payloads()
+    whenever a document's nodes are added, changed or removed.
+
+    Args:
+        document_id: The document ID, which must be in mindmap_store
+        depth: How many levels below the root to include
+
+    Returns:
+        The MindMapResponse as JSON bytes
+    """
+    return _build_mindmap_payload(document_id, depth, _payload_versions.get(document_id, 0))
+
+
+@lru_cache(maxsize=256)
+def _build_mindmap_payload(document_id: str, depth: int, version: int) -> bytes:
+    """Serialize a mind-map; cached per payload version (see get_mindmap_payload)."""
+    root_id = mindmap_store[document_id]
+
+    # Collect nodes up to specified depth (breadth-first)
+    nodes = []
+    append = nodes.append
+    queue = deque([(root_id, 0)])
+
+    while queue:
+        node_id, current_depth = queue.popleft()
+        node = nodes_store.get(node_id)
+        if node is None:
+            continue
+
+        append(_node_payload(node, include_content=current_depth == 0))
+
+        if current_depth < depth:
+            queue.extend((child_id, current_depth + 1) for child_id in node.children_ids)
+
+    return orjson.dumps({"document_id": document_id, "nodes": nodes, "root_id": root_id})
+
+
+def warm_mindmap_payloads(document_id: str) -> None:
+    """Build the commonly requested payloads for a document ahead of time."""
+    for depth in range(PRECOMPUTED_MINDMAP_DEPTH + 1):
+        get_mindmap_payload(document_id, depth)
+
+
+def invalidate_mindmap_payloads(document_id: Optional[str] = None) -> None:
+    """
+    Stop using cached mind-map payloads after the node stores change.
+
+    For a single document this bumps its payload version; its old entries
+    are never hit again and age out of the LRU.
+
+    Args:
+        document_id: The document whose nodes changed, or None for all documents
+    """
+    if document_id is None:
+        _build_mindmap_payload.cache_clear()
+    else:
+        _payload_versions[document_id] = _payload_versions.get(document_id, 0) + 1
+
+
+def drop_document_nodes(document_id: str) -> None:
+    """
+    Remove a document's nodes and mind-map from the in-memory stores.
+
+    Nodes are found through the per-document index, so this touches only
+    the document's own nodes.
+    """
+    for node_id in document_nodes_store.pop(document_id, []):
+        nodes_store.pop(node_id, None)
+    mindmap_store.pop(document_id, None)
+    invalidate_mindmap_payloads(document_id)
+
+
+@lru_cache(maxsize=64)
+def _radial_offsets(num_children: int) -> tuple[tuple[float, float], ...]:
+    """Unit-circle (cos, sin) offsets for evenly spaced children, starting from the top."""
+    return tuple(
+        (math.cos(angle), math.sin(angle))
+        for angle in (
+            (2 * math.pi * i / num_children) - (math.pi / 2)
+            for i in range(num_children)
+        )
+    )
 
 
 class MindMapGenerator:
     """Service for generating mind-map structures from documents."""
 
     def __init__(self):
-        self.claude_service = ClaudeService()
+        self.claude_service = get_claude_service()
 
     async def generate_mindmap(self, document_id: UUID, extracted_data: dict) -> str:
         """
@@ -29,40 +170,45 @@ class MindMapGenerator:
         Returns:
             The root node ID
         """
-        logger.info(f"[{document_id}] Starting mind-map generation")
+        logger.info("[%s] Starting mind-map generation", document_id)
 
         # Use Claude to analyze structure
-        logger.info(f"[{document_id}] Requesting structure analysis from Claude")
+        logger.info("[%s] Requesting structure analysis from Claude", document_id)
         structure = await self.claude_service.generate_structure(
             extracted_data["text"]
         )
-        logger.info(f"[{document_id}] Structure received: {structure.get('title', 'Unknown')}")
+        logger.info("[%s] Structure received: %s", document_id, structure.get('title', 'Unknown'))
 
         # Convert structure to nodes
-        logger.info(f"[{document_id}] Creating nodes from structure")
+        logger.info("[%s] Creating nodes from structure", document_id)
+        doc_id_str = str(document_id)
+        # Regenerating replaces any earlier nodes rather than orphaning them
+        drop_document_nodes(doc_id_str)
+        document_nodes_store[doc_id_str] = []
         root_node = self._create_nodes_from_structure(
-            document_id=document_id,
+            document_id=doc_id_str,
             structure=structure,
             parent_id=None,
             depth=0,
         )
-        logger.info(f"[{document_id}] Created {len(nodes_store)} total nodes")
+        logger.info("[%s] Created %s nodes", document_id, len(document_nodes_store[doc_id_str]))
 
         # Calculate positions for layout
-        logger.debug(f"[{document_id}] Calculating node positions")
-        self._calculate_positions(str(root_node.id))
+        logger.debug("[%s] Calculating node positions", document_id)
+        self._calculate_positions(root_node.id)
 
         # Store mapping
-        mindmap_store[str(document_id)] = str(root_node.id)
-        logger.info(f"[{document_id}] Mind-map complete, root node: {root_node.id}")
+        mindmap_store[doc_id_str] = root_node.id
+        invalidate_mindmap_payloads(doc_id_str)
+        logger.info("[%s] Mind-map complete, root node: %s", document_id, root_node.id)
 
-        return str(root_node.id)
+        return root_node.id
 
     def _create_nodes_from_structure(
         self,
-        document_id: UUID,
+        document_id: str,
         structure: dict,
-        parent_id: Optional[UUID],
+        parent_id: Optional[str],
         depth: int,
     ) -> MindMapNode:
         """Recursively create nodes from the structure."""
@@ -77,11 +223,9 @@ class MindMapGenerator:
         elif depth >= 4:
             node_type = NodeType.DETAIL
 
-        node_id = uuid4()
         children = structure.get("children", [])
 
         node = MindMapNode(
-            id=node_id,
             document_id=document_id,
             parent_id=parent_id,
             title=structure.get("title", "Untitled"),
@@ -90,21 +234,22 @@ class MindMapGenerator:
             node_type=node_type,
             depth=depth,
             children_ids=[],
-            key_concepts=structure.get("key_concepts", []),
+            key_concepts=_intern_concepts(structure.get("key_concepts", [])),
             has_children=len(children) > 0,
             page_start=structure.get("page_start"),
             page_end=structure.get("page_end"),
         )
 
-        # Store node
-        nodes_store[str(node_id)] = node
+        # Store node and index it under its document
+        nodes_store[node.id] = node
+        document_nodes_store[document_id].append(node.id)
 
         # Create children
         for child_structure in children:
             child_node = self._create_nodes_from_structure(
                 document_id=document_id,
                 structure=child_structure,
-                parent_id=node_id,
+                parent_id=node.id,
                 depth=depth + 1,
             )
             node.children_ids.append(child_node.id)
@@ -120,35 +265,28 @@ class MindMapGenerator:
         - Children spread out radially
         - Deeper levels are further from center
         """
-        import math
-
         if root_id not in nodes_store:
             return
 
-        root = nodes_store[root_id]
-        root.position_x = x
-        root.position_y = y
-
-        if not root.children_ids:
-            return
-
-        # Calculate positions for children
-        num_children = len(root.children_ids)
-        radius = 200 + (root.depth * 100)  # Increase radius with depth
+        # Breadth-first, so deep trees can't hit the recursion limit
+        queue = deque([(root_id, x, y)])
 
-        for i, child_id in enumerate(root.children_ids):
-            angle = (2 * math.pi * i / num_children) - (math.pi / 2)  # Start from top
+        while queue:
+            node_id, x, y = queue.popleft()
+            node = nodes_store[node_id]
+            node.position_x = x
+            node.position_y = y
 
-            child_x = x + radius * math.cos(angle)
-            child_y = y + radius * math.sin(angle)
+            if not node.children_ids:
+                continue
 
-            child_id_str = str(child_id)
-            if child_id_str in nodes_store:
-                nodes_store[child_id_str].position_x = child_x
-                nodes_store[child_id_str].position_y = child_y
+            # Calculate positions for children
+            radius = 200 + (node.depth * 100)  # Increase radius with depth
+            offsets = _radial_offsets(len(node.children_ids))
 
-                # Recursively position children
-                self._calculate_positions(child_id_str, child_x, child_y)
+            for child_id, (dx, dy) in zip(node.children_ids, offsets):
+                if child_id in nodes_store:
+                    queue.append((child_id, x + radius * dx, y + radius * dy))
 
     def _calculate_tree_positions(self, root_id: str):
         """
@@ -181,7 +319,7 @@ class MindMapGenerator:
             # Position children first
             child_y_positions = []
             for child_id in node.children_ids:
-                child_y = position_node(str(child_id), x + horizontal_spacing)
+                child_y = position_node(child_id, x + horizontal_spacing)
                 child_y_positions.append(child_y)
 
             # Center parent among children
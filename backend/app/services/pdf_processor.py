@@ -1,3 +1,5 @@
+import asyncio
+import io
 import fitz  # PyMuPDF
 from pathlib import Path
 
@@ -19,35 +21,43 @@ class PDFProcessor:
                 - pages: List of page texts with page numbers
                 - page_count: Total number of pages
         """
-        logger.debug(f"Opening PDF: {file_path}")
+        logger.debug("Opening PDF: %s", file_path)
         path = Path(file_path)
         if not path.exists():
-            logger.error(f"PDF file not found: {file_path}")
+            logger.error("PDF file not found: %s", file_path)
             raise FileNotFoundError(f"PDF file not found: {file_path}")
 
-        doc = fitz.open(file_path)
-        logger.info(f"PDF opened successfully: {len(doc)} pages")
+        # PyMuPDF is blocking, so run it off the event loop
+        return await asyncio.to_thread(self._extract_text_sync, file_path)
 
+    def _extract_text_sync(self, file_path: str) -> dict:
+        """Read every page's text; runs in a worker thread."""
         pages = []
-        full_text_parts = []
+        # Page texts are kept once in pages; the full text is written straight
+        # into a buffer rather than a second list of the same strings
+        buf = io.StringIO()
+        total_chars = 0
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            text = page.get_text()
+        with fitz.open(file_path) as doc:
+            logger.info("PDF opened successfully: %s pages", len(doc))
 
-            pages.append({
-                "page_number": page_num + 1,
-                "text": text,
-            })
-            full_text_parts.append(text)
-            logger.debug(f"Extracted page {page_num + 1}: {len(text)} characters")
+            for page_num, page in enumerate(doc):
+                text = page.get_text()
+
+                pages.append({
+                    "page_number": page_num + 1,
+                    "text": text,
+                })
+                if page_num:
+                    buf.write("\n\n")
+                buf.write(text)
+                total_chars += len(text)
+                logger.debug("Extracted page %s: %s characters", page_num + 1, len(text))
 
-        doc.close()
-        total_chars = sum(len(p["text"]) for p in pages)
-        logger.info(f"PDF extraction complete: {len(pages)} pages, {total_chars} total characters")
+        logger.info("PDF extraction complete: %s pages, %s total characters", len(pages), total_chars)
 
         return {
-            "text": "\n\n".join(full_text_parts),
+            "text": buf.getvalue(),
             "pages": pages,
             "page_count": len(pages),
         }
@@ -63,50 +73,59 @@ class PDFProcessor:
         if not path.exists():
             raise FileNotFoundError(f"PDF file not found: {file_path}")
 
-        doc = fitz.open(file_path)
+        return await asyncio.to_thread(self._extract_with_structure_sync, file_path)
 
+    def _extract_with_structure_sync(self, file_path: str) -> dict:
+        """Classify every text block by font size; runs in a worker thread."""
         structured_content = []
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-
-            # Get text blocks with position info
-            blocks = page.get_text("dict")["blocks"]
-
-            for block in blocks:
-                if "lines" not in block:
-                    continue
-
-                block_text = ""
-                max_font_size = 0
-
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        block_text += span["text"]
-                        max_font_size = max(max_font_size, span["size"])
-                    block_text += "\n"
-
-                block_text = block_text.strip()
-                if not block_text:
-                    continue
-
-                # Heuristic: larger fonts are likely headers
-                block_type = "paragraph"
-                if max_font_size > 14:
-                    block_type = "header"
-                elif max_font_size > 12:
-                    block_type = "subheader"
-
-                structured_content.append({
-                    "type": block_type,
-                    "text": block_text,
-                    "page": page_num + 1,
-                    "font_size": max_font_size,
-                })
-
-        doc.close()
+        with fitz.open(file_path) as doc:
+            for page_num, page in enumerate(doc):
+                structured_content.extend(self._page_blocks(page, page_num + 1))
+            page_count = len(doc)
 
         return {
             "structured_content": structured_content,
-            "page_count": len(doc) if doc else 0,
+            "page_count": page_count,
         }
+
+    @staticmethod
+    def _page_blocks(page: fitz.Page, page_number: int) -> list[dict]:
+        """Get a page's non-empty text blocks, typed by their largest font."""
+        structured_content = []
+
+        # Get text blocks with position info
+        blocks = page.get_text("dict")["blocks"]
+
+        for block in blocks:
+            if "lines" not in block:
+                continue
+
+            block_text = ""
+            max_font_size = 0
+
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    block_text += span["text"]
+                    max_font_size = max(max_font_size, span["size"])
+                block_text += "\n"
+
+            block_text = block_text.strip()
+            if not block_text:
+                continue
+
+            # Heuristic: larger fonts are likely headers
+            block_type = "paragraph"
+            if max_font_size > 14:
+                block_type = "header"
+            elif max_font_size > 12:
+                block_type = "subheader"
+
+            structured_content.append({
+                "type": block_type,
+                "text": block_text,
+                "page": page_number,
+                "font_size": max_font_size,
+            })
+
+        return structured_content
@@ -1,4 +1,4 @@
-from app.services.claude_service import ClaudeService
+from app.services.claude_service import get_claude_service
 from app.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -8,7 +8,7 @@ class QAService:
     """Service for answering questions about document content."""
 
     def __init__(self):
-        self.claude_service = ClaudeService()
+        self.claude_service = get_claude_service()
 
     async def answer_question(self, question: str, context: str) -> dict:
         """
@@ -21,7 +21,7 @@ class QAService:
         Returns:
             dict with answer and confidence score
         """
-        logger.info(f"Processing Q&A: '{question[:50]}...' with {len(context)} chars of context")
+        logger.info("Processing Q&A: '%s...' with %s chars of context", question[:50], len(context))
         result = await self.claude_service.answer_question(question, context)
-        logger.info(f"Q&A complete, confidence: {result['confidence']}")
+        logger.info("Q&A complete, confidence: %s", result['confidence'])
         return result
@@ -5,17 +5,26 @@ Provides filesystem-based storage for documents and their mindmaps,
 avoiding the need to reprocess documents on server restart.
 """
 
+import asyncio
+import atexit
 import hashlib
-import json
+import os
 import re
 import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+import orjson
+from cachetools import TTLCache
+from pydantic import BaseModel, TypeAdapter
 
 from app.config import get_settings
 from app.logging_config import get_logger
@@ -24,6 +33,30 @@ from app.models.mindmap import MindMapNode
 logger = get_logger(__name__)
 settings = get_settings()
 
+# Content hashes are 16 lowercase hex characters (fullmatch, so a
+# trailing newline is rejected too)
+_CONTENT_HASH_RE = re.compile(r"[a-f0-9]{16}")
+
+# Batch converter for persisting lists of nodes
+_node_list_adapter = TypeAdapter(list[MindMapNode])
+
+
+@lru_cache(maxsize=1)
+def _format_utc_second(seconds: int) -> str:
+    """Format a Unix time in whole seconds as a naive UTC ISO string."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds))
+
+
+def _now_iso() -> str:
+    """
+    Get the current UTC time as an ISO 8601 string with microseconds.
+
+    Same format as datetime.utcnow().isoformat(), except microseconds are
+    always included. The seconds part is formatted once per second.
+    """
+    seconds, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_format_utc_second(seconds)}.{nanoseconds // 1000:06d}"
+
 
 class PersistedMindMap(BaseModel):
     """Schema for mindmap.json files."""
@@ -33,9 +66,15 @@ class PersistedMindMap(BaseModel):
     original_filename: str
     page_count: int
     root_node_id: str
-    nodes: list[dict]
     created_at: str
     last_modified: str
+    # Last, so the header fields above can be read without parsing the nodes
+    nodes: list[dict]
+
+    @cached_property
+    def last_modified_dt(self) -> datetime:
+        """last_modified parsed once per loaded mindmap."""
+        return datetime.fromisoformat(self.last_modified)
 
 
 class AuditEntry(BaseModel):
@@ -71,11 +110,67 @@ class DocumentStorage:
     MINDMAP_FILENAME = "mindmap.json"
     AUDIT_FILENAME = "audit.log"
     PDF_FILENAME = "original.pdf"
+    COPY_CHUNK_SIZE = 64 * 1024
+    # Bytes read from the start of mindmap.json when listing documents
+    MINDMAP_HEADER_SIZE = 4096
+    # Block size for reading the audit log backwards
+    AUDIT_READ_BLOCK_SIZE = 64 * 1024
+    # Loaded mindmaps kept in memory; the least recently used is dropped
+    MINDMAP_CACHE_SIZE = 64
+    # Threads reading mindmap headers in list_documents
+    LIST_DOCUMENTS_WORKERS = 16
+    # Validated content hashes remembered with their folder paths
+    FOLDER_CACHE_SIZE = 4096
+
+    # Buffered audit entries per document before they are written out
+    AUDIT_BUFFER_LIMIT = 32
+    # Audit logs kept open for appending; the least recently used is closed
+    MAX_OPEN_AUDIT_FILES = 128
+
+    # How long cached filesystem metadata is trusted, in case another
+    # process changes the documents directory
+    METADATA_CACHE_TTL = 60.0
+    # Content hashes whose existence is remembered; the oldest are dropped
+    EXISTS_CACHE_SIZE = 4096
 
     def __init__(self, documents_dir: Optional[Path] = None):
         self.documents_dir = documents_dir or settings.documents_dir
         self._ensure_documents_dir()
 
+        # content_hash -> folder path, for hashes that passed validation
+        self._folders: dict[str, Path] = {}
+        # content_hash -> exists, bounded so probing many hashes can't grow it
+        self._exists_cache: TTLCache = TTLCache(
+            maxsize=self.EXISTS_CACHE_SIZE, ttl=self.METADATA_CACHE_TTL, timer=time.monotonic
+        )
+        # (cached_at, documents) for list_documents
+        self._documents_cache: Optional[tuple[float, list[DocumentInfo]]] = None
+        # Bumped by _invalidate_metadata. A filesystem check only caches its
+        # result if no invalidation happened while it ran (a save on a worker
+        # thread could otherwise be overwritten by an older result).
+        self._metadata_generation = 0
+        # content_hash -> serialized audit lines not yet written; see flush_audit()
+        self._audit_buffers: dict[str, list[bytes]] = {}
+        # content_hash -> open audit log, most recently used last
+        self._audit_files: OrderedDict[str, BinaryIO] = OrderedDict()
+        # content_hash -> (file version, mindmap), most recently used last.
+        # Entries are only used while mindmap.json is unchanged on disk.
+        self._mindmap_cache: OrderedDict[str, tuple[tuple, PersistedMindMap]] = OrderedDict()
+        # Document folders known to exist; see _ensure_document_folder()
+        self._known_folders: set[str] = set()
+        # Reads mindmap headers for list_documents; created on first use
+        self._list_executor: Optional[ThreadPoolExecutor] = None
+        # Guards the metadata caches, audit buffers and files and the mindmap
+        # cache, since storage is also used from worker threads (see asave_mindmap)
+        self._lock = threading.RLock()
+
+    def _invalidate_metadata(self, content_hash: str) -> None:
+        """Forget cached metadata after a document is created, saved or deleted."""
+        with self._lock:
+            self._metadata_generation += 1
+            self._exists_cache.pop(content_hash, None)
+            self._documents_cache = None
+
     def _ensure_documents_dir(self):
         """Ensure the documents directory exists."""
         self.documents_dir.mkdir(parents=True, exist_ok=True)
@@ -98,13 +193,34 @@ class DocumentStorage:
         Raises:
             ValueError: If the hash format is invalid
         """
-        if not re.match(r'^[a-f0-9]{16}$', content_hash):
+        if not _CONTENT_HASH_RE.fullmatch(content_hash):
             raise ValueError(f"Invalid content hash format: {content_hash}")
 
     def _get_document_folder(self, content_hash: str) -> Path:
         """Get the folder path for a document by its content hash."""
-        self._validate_content_hash(content_hash)
-        return self.documents_dir / content_hash
+        # Every storage call goes through here; a hash seen before skips
+        # validation and building the Path
+        folder = self._folders.get(content_hash)
+        if folder is None:
+            self._validate_content_hash(content_hash)
+            folder = self.documents_dir / content_hash
+            if len(self._folders) >= self.FOLDER_CACHE_SIZE:
+                self._folders.clear()
+            self._folders[content_hash] = folder
+        return folder
+
+    def _ensure_document_folder(self, content_hash: str) -> Path:
+        """
+        Get a document's folder, creating it if needed.
+
+        Folders created or seen by this instance are remembered so repeat
+        saves skip the mkdir call; delete_document forgets them.
+        """
+        folder = self._get_document_folder(content_hash)
+        if content_hash not in self._known_folders:
+            folder.mkdir(parents=True, exist_ok=True)
+            self._known_folders.add(content_hash)
+        return folder
 
     def compute_content_hash(self, file_path: Path) -> str:
         """
@@ -116,11 +232,29 @@ class DocumentStorage:
         Returns:
             First 16 characters of the hex-encoded SHA-256 hash
         """
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256_hash.update(chunk)
-        return sha256_hash.hexdigest()[:16]
+        # file_digest reads into one reusable buffer in C; the file is opened
+        # unbuffered since it does its own buffering
+        with open(file_path, "rb", buffering=0) as f:
+            sha256_hash = hashlib.file_digest(f, self.new_content_hasher)
+        return self.content_hash_from_hasher(sha256_hash)
+
+    def new_content_hasher(self) -> "hashlib._Hash":
+        """
+        Create a hasher for computing a content hash incrementally.
+
+        Feed it chunks as they are written and pass it to
+        content_hash_from_hasher() to avoid re-reading the file.
+        """
+        return hashlib.sha256()
+
+    def content_hash_from_hasher(self, hasher: "hashlib._Hash") -> str:
+        """
+        Get the content hash from a hasher created by new_content_hasher().
+
+        Returns:
+            First 16 characters of the hex-encoded SHA-256 hash
+        """
+        return hasher.hexdigest()[:16]
 
     def document_exists(self, content_hash: str) -> bool:
         """
@@ -133,8 +267,19 @@ class DocumentStorage:
             True if document folder and mindmap.json exist
         """
         folder = self._get_document_folder(content_hash)
+
+        with self._lock:
+            cached = self._exists_cache.get(content_hash)
+            generation = self._metadata_generation
+        if cached is not None:
+            return cached
+
         mindmap_path = folder / self.MINDMAP_FILENAME
-        return folder.exists() and mindmap_path.exists()
+        exists = folder.exists() and mindmap_path.exists()
+        with self._lock:
+            if generation == self._metadata_generation:
+                self._exists_cache[content_hash] = exists
+        return exists
 
     def create_document_folder(self, content_hash: str, source_pdf: Path) -> Path:
         """
@@ -147,18 +292,48 @@ class DocumentStorage:
         Returns:
             Path to the created document folder
         """
-        folder = self._get_document_folder(content_hash)
-        folder.mkdir(parents=True, exist_ok=True)
+        folder = self._ensure_document_folder(content_hash)
 
-        # Copy PDF to folder
         dest_pdf = folder / self.PDF_FILENAME
         if not dest_pdf.exists():
-            shutil.copy2(source_pdf, dest_pdf)
-            logger.info(f"Copied PDF to {dest_pdf}")
+            # copyfile skips the metadata copy2 would do and copies in-kernel
+            # (sendfile) on Linux
+            shutil.copyfile(source_pdf, dest_pdf)
+            logger.info("Copied PDF to %s", dest_pdf)
 
         self._append_audit_log(content_hash, "document_created", {
             "source_path": str(source_pdf)
         })
+        self.flush_audit(content_hash)
+
+        return folder
+
+    def create_document_folder_from_fileobj(self, content_hash: str, source: BinaryIO) -> Path:
+        """
+        Create a document folder and write the PDF from an open file object.
+
+        Used for uploads so the PDF is written once, directly to its final
+        location, without an intermediate temp file.
+
+        Args:
+            content_hash: The content hash for the document
+            source: Binary file object positioned at the start of the PDF
+
+        Returns:
+            Path to the created document folder
+        """
+        folder = self._ensure_document_folder(content_hash)
+
+        dest_pdf = folder / self.PDF_FILENAME
+        if not dest_pdf.exists():
+            with open(dest_pdf, "wb") as f:
+                shutil.copyfileobj(source, f, self.COPY_CHUNK_SIZE)
+            logger.info("Wrote PDF to %s", dest_pdf)
+
+        self._append_audit_log(content_hash, "document_created", {
+            "source_path": "upload"
+        })
+        self.flush_audit(content_hash)
 
         return folder
 
@@ -172,10 +347,13 @@ class DocumentStorage:
         Returns:
             Path to the PDF file, or None if not found
         """
-        folder = self._get_document_folder(content_hash)
-        pdf_path = folder / self.PDF_FILENAME
+        pdf_path = self.pdf_path_for(content_hash)
         return pdf_path if pdf_path.exists() else None
 
+    def pdf_path_for(self, content_hash: str) -> Path:
+        """Get where a document's PDF is stored, whether or not it exists yet."""
+        return self._get_document_folder(content_hash) / self.PDF_FILENAME
+
     def save_mindmap(
         self,
         content_hash: str,
@@ -196,22 +374,12 @@ class DocumentStorage:
             root_node_id: ID of the root node
             nodes: List of all mindmap nodes
         """
-        folder = self._get_document_folder(content_hash)
-        folder.mkdir(parents=True, exist_ok=True)
-
-        now = datetime.utcnow().isoformat()
-
-        # Convert nodes to serializable format
-        nodes_data = []
-        for node in nodes:
-            node_dict = node.model_dump()
-            # Convert UUIDs to strings
-            node_dict["id"] = str(node_dict["id"])
-            node_dict["document_id"] = str(node_dict["document_id"])
-            if node_dict["parent_id"]:
-                node_dict["parent_id"] = str(node_dict["parent_id"])
-            node_dict["children_ids"] = [str(cid) for cid in node_dict["children_ids"]]
-            nodes_data.append(node_dict)
+        folder = self._ensure_document_folder(content_hash)
+
+        now = _now_iso()
+
+        # Convert nodes to JSON-ready dicts in one pydantic-core call
+        nodes_data = _node_list_adapter.dump_python(nodes, mode="json")
 
         mindmap = PersistedMindMap(
             version="1.0",
@@ -226,16 +394,42 @@ class DocumentStorage:
         )
 
         mindmap_path = folder / self.MINDMAP_FILENAME
-        with open(mindmap_path, "w") as f:
-            f.write(mindmap.model_dump_json(indent=2))
+        self._write_atomic(
+            mindmap_path,
+            orjson.dumps(mindmap.model_dump(mode="json"), option=orjson.OPT_INDENT_2),
+        )
 
-        logger.info(f"Saved mindmap to {mindmap_path} with {len(nodes)} nodes")
+        self._cache_mindmap(content_hash, self._file_version(mindmap_path), mindmap)
+
+        logger.info("Saved mindmap to %s with %s nodes", mindmap_path, len(nodes))
+        self._invalidate_metadata(content_hash)
 
         self._append_audit_log(content_hash, "mindmap_saved", {
             "document_id": document_id,
             "node_count": len(nodes),
             "root_node_id": root_node_id,
         })
+        self.flush_audit(content_hash)
+
+    async def asave_mindmap(
+        self,
+        content_hash: str,
+        document_id: str,
+        original_filename: str,
+        page_count: int,
+        root_node_id: str,
+        nodes: list[MindMapNode],
+    ) -> None:
+        """Run save_mindmap in a worker thread so the event loop isn't blocked."""
+        await asyncio.to_thread(
+            self.save_mindmap,
+            content_hash=content_hash,
+            document_id=document_id,
+            original_filename=original_filename,
+            page_count=page_count,
+            root_node_id=root_node_id,
+            nodes=nodes,
+        )
 
     def load_mindmap(self, content_hash: str) -> Optional[PersistedMindMap]:
         """
@@ -250,26 +444,52 @@ class DocumentStorage:
         folder = self._get_document_folder(content_hash)
         mindmap_path = folder / self.MINDMAP_FILENAME
 
-        if not mindmap_path.exists():
-            logger.debug(f"No mindmap found at {mindmap_path}")
+        try:
+            version = self._file_version(mindmap_path)
+        except FileNotFoundError:
+            logger.debug("No mindmap found at %s", mindmap_path)
             return None
 
-        try:
-            with open(mindmap_path, "r") as f:
-                data = json.load(f)
+        mindmap = None
+        with self._lock:
+            cached = self._mindmap_cache.get(content_hash)
+            if cached and cached[0] == version:
+                self._mindmap_cache.move_to_end(content_hash)
+                mindmap = cached[1]
 
-            mindmap = PersistedMindMap(**data)
-            logger.info(f"Loaded mindmap from {mindmap_path} with {len(mindmap.nodes)} nodes")
+        if mindmap is None:
+            try:
+                with open(mindmap_path, "rb") as f:
+                    data = orjson.loads(f.read())
 
-            self._append_audit_log(content_hash, "mindmap_loaded", {
-                "document_id": mindmap.document_id,
-                "node_count": len(mindmap.nodes),
-            })
+                mindmap = PersistedMindMap(**data)
+            except Exception as e:
+                logger.error("Failed to load mindmap from %s: %s", mindmap_path, e)
+                return None
+            self._cache_mindmap(content_hash, version, mindmap)
 
-            return mindmap
-        except Exception as e:
-            logger.error(f"Failed to load mindmap from {mindmap_path}: {e}")
-            return None
+        logger.info("Loaded mindmap from %s with %s nodes", mindmap_path, len(mindmap.nodes))
+
+        self._append_audit_log(content_hash, "mindmap_loaded", {
+            "document_id": mindmap.document_id,
+            "node_count": len(mindmap.nodes),
+        })
+
+        return mindmap
+
+    @staticmethod
+    def _file_version(path: Path) -> tuple:
+        """Identify a file's current contents by inode, size and modification time."""
+        st = path.stat()
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _cache_mindmap(self, content_hash: str, version: tuple, mindmap: PersistedMindMap) -> None:
+        """Remember a mindmap as the contents of the given file version."""
+        with self._lock:
+            self._mindmap_cache[content_hash] = (version, mindmap)
+            self._mindmap_cache.move_to_end(content_hash)
+            if len(self._mindmap_cache) > self.MINDMAP_CACHE_SIZE:
+                self._mindmap_cache.popitem(last=False)
 
     def update_mindmap_nodes(self, content_hash: str, updated_nodes: list[MindMapNode]) -> bool:
         """
@@ -286,34 +506,48 @@ class DocumentStorage:
         if not mindmap:
             return False
 
-        # Build a map of existing nodes
+        # Build a map of existing nodes and merge the updates in one step;
+        # replaced nodes keep their position
         nodes_map = {node["id"]: node for node in mindmap.nodes}
+        nodes_map.update({
+            node["id"]: node
+            for node in _node_list_adapter.dump_python(updated_nodes, mode="json")
+        })
 
-        # Update nodes
-        for node in updated_nodes:
-            node_dict = node.model_dump()
-            node_dict["id"] = str(node_dict["id"])
-            node_dict["document_id"] = str(node_dict["document_id"])
-            if node_dict["parent_id"]:
-                node_dict["parent_id"] = str(node_dict["parent_id"])
-            node_dict["children_ids"] = [str(cid) for cid in node_dict["children_ids"]]
-            nodes_map[node_dict["id"]] = node_dict
-
-        # Update mindmap
-        mindmap.nodes = list(nodes_map.values())
-        mindmap.last_modified = datetime.utcnow().isoformat()
+        # Written as a plain dict: the nodes are already JSON-ready dicts, so
+        # there is nothing for pydantic to validate or convert. Field order
+        # matches PersistedMindMap, with nodes last.
+        data = {
+            "version": mindmap.version,
+            "document_id": mindmap.document_id,
+            "content_hash": mindmap.content_hash,
+            "original_filename": mindmap.original_filename,
+            "page_count": mindmap.page_count,
+            "root_node_id": mindmap.root_node_id,
+            "created_at": mindmap.created_at,
+            "last_modified": _now_iso(),
+            "nodes": list(nodes_map.values()),
+        }
 
         # Save
         folder = self._get_document_folder(content_hash)
         mindmap_path = folder / self.MINDMAP_FILENAME
-        with open(mindmap_path, "w") as f:
-            f.write(mindmap.model_dump_json(indent=2))
+        self._write_atomic(mindmap_path, orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+        # A new object; the loaded mindmap may be shared through the cache
+        self._cache_mindmap(
+            content_hash,
+            self._file_version(mindmap_path),
+            PersistedMindMap.model_construct(**data),
+        )
 
-        logger.info(f"Updated mindmap at {mindmap_path}")
+        logger.info("Updated mindmap at %s", mindmap_path)
+        self._invalidate_metadata(content_hash)
 
         self._append_audit_log(content_hash, "mindmap_updated", {
             "updated_node_count": len(updated_nodes),
         })
+        self.flush_audit(content_hash)
 
         return True
 
@@ -324,71 +558,167 @@ class DocumentStorage:
         Returns:
             List of DocumentInfo objects for all valid documents
         """
-        documents = []
+        now = time.monotonic()
+        with self._lock:
+            cached = self._documents_cache
+            generation = self._metadata_generation
+        if cached and now - cached[0] < self.METADATA_CACHE_TTL:
+            return list(cached[1])
 
         if not self.documents_dir.exists():
-            return documents
+            return []
 
-        for folder in self.documents_dir.iterdir():
-            if not folder.is_dir() or folder.name.startswith("."):
-                continue
+        with os.scandir(self.documents_dir) as entries:
+            folders = [
+                (entry.name, entry.path)
+                for entry in entries
+                if not entry.name.startswith(".") and entry.is_dir(follow_symlinks=False)
+            ]
 
-            mindmap_path = folder / self.MINDMAP_FILENAME
-            if not mindmap_path.exists():
-                continue
+        # Header reads are independent and I/O-bound, so they run in parallel
+        if len(folders) > 1:
+            infos = list(self._get_list_executor().map(self._read_document_info, *zip(*folders)))
+        else:
+            infos = [self._read_document_info(name, path) for name, path in folders]
 
-            try:
-                with open(mindmap_path, "r") as f:
-                    data = json.load(f)
-
-                documents.append(DocumentInfo(
-                    content_hash=folder.name,
-                    document_id=data.get("document_id"),
-                    original_filename=data.get("original_filename", "Unknown"),
-                    page_count=data.get("page_count", 0),
-                    created_at=data.get("created_at", ""),
-                    last_modified=data.get("last_modified", ""),
-                ))
-            except Exception as e:
-                logger.warning(f"Failed to read mindmap in {folder}: {e}")
-                continue
+        documents = [info for info in infos if info is not None]
 
         # Sort by last_modified, newest first
         documents.sort(key=lambda d: d.last_modified, reverse=True)
 
-        return documents
+        with self._lock:
+            if generation == self._metadata_generation:
+                self._documents_cache = (now, documents)
+        return list(documents)
+
+    def _get_list_executor(self) -> ThreadPoolExecutor:
+        """Get the shared pool for list_documents, creating it if needed."""
+        with self._lock:
+            if self._list_executor is None:
+                self._list_executor = ThreadPoolExecutor(
+                    max_workers=self.LIST_DOCUMENTS_WORKERS,
+                    thread_name_prefix="list-documents",
+                )
+            return self._list_executor
+
+    def _read_document_info(self, content_hash: str, folder: str) -> Optional[DocumentInfo]:
+        """Read a document's listing info from its mindmap header; None if it has no mindmap."""
+        try:
+            data = self._read_mindmap_header(Path(folder) / self.MINDMAP_FILENAME)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Failed to read mindmap in %s: %s", folder, e)
+            return None
 
-    def get_audit_log(self, content_hash: str) -> list[AuditEntry]:
+        return DocumentInfo(
+            content_hash=content_hash,
+            document_id=data.get("document_id"),
+            original_filename=data.get("original_filename", "Unknown"),
+            page_count=data.get("page_count", 0),
+            created_at=data.get("created_at", ""),
+            last_modified=data.get("last_modified", ""),
+        )
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """
+        Replace a file's contents so readers see the old or new file, never a partial one.
+
+        The data goes to a temporary file next to the target, which is
+        synced and then renamed over it.
+        """
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _read_mindmap_header(self, mindmap_path: Path) -> dict:
+        """
+        Read the top-level fields of a mindmap.json, without its nodes.
+
+        save_mindmap writes nodes last, so the other fields fit in the first
+        MINDMAP_HEADER_SIZE bytes and are parsed on their own. Files written
+        with nodes earlier (or an unusually long header) are parsed in full.
+        """
+        with open(mindmap_path, "rb") as f:
+            head = f.read(self.MINDMAP_HEADER_SIZE)
+
+            # Top-level keys are the only ones indented by two spaces, and
+            # newlines inside strings are escaped, so this is the nodes key
+            end = head.find(b'\n  "nodes":')
+            if end != -1:
+                header = orjson.loads(head[:end].rstrip(b",") + b"\n}")
+                if "last_modified" in header:
+                    return header
+
+            return orjson.loads(head + f.read())
+
+    def get_audit_log(self, content_hash: str, limit: Optional[int] = None) -> list[AuditEntry]:
         """
         Get the audit log for a document.
 
         Args:
             content_hash: Document content hash
+            limit: Only return this many of the newest entries; read from the
+                end of the file, so older entries are never loaded
 
         Returns:
             List of audit entries, newest first
         """
         folder = self._get_document_folder(content_hash)
         audit_path = folder / self.AUDIT_FILENAME
+        self.flush_audit(content_hash)
 
         if not audit_path.exists():
             return []
 
         entries = []
         try:
-            with open(audit_path, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        data = json.loads(line)
-                        entries.append(AuditEntry(**data))
+            if limit is None:
+                with open(audit_path, "rb") as f:
+                    lines = f.read().splitlines()
+                # Return newest first
+                lines.reverse()
+            else:
+                lines = self._read_last_lines(audit_path, limit)
+
+            for line in lines:
+                if line.strip():
+                    entries.append(AuditEntry(**orjson.loads(line)))
         except Exception as e:
-            logger.error(f"Failed to read audit log from {audit_path}: {e}")
+            logger.error("Failed to read audit log from %s: %s", audit_path, e)
 
-        # Return newest first
-        entries.reverse()
         return entries
 
+    def _read_last_lines(self, path: Path, count: int) -> list[bytes]:
+        """Read up to count non-empty lines from the end of a file, last line first."""
+        lines: list[bytes] = []
+
+        with open(path, "rb") as f:
+            pos = f.seek(0, os.SEEK_END)
+            # Start of the earliest line seen, which may continue in the previous block
+            partial = b""
+
+            while pos > 0 and len(lines) < count:
+                size = min(self.AUDIT_READ_BLOCK_SIZE, pos)
+                pos -= size
+                f.seek(pos)
+                parts = (f.read(size) + partial).split(b"\n")
+                partial = parts.pop(0)
+                lines.extend(line for line in reversed(parts) if line.strip())
+
+            if partial.strip():
+                lines.append(partial)
+
+        return lines[:count]
+
     def delete_document(self, content_hash: str) -> bool:
         """
         Delete a document and all its files.
@@ -400,41 +730,109 @@ class DocumentStorage:
             True if deletion succeeded, False if document not found
         """
         folder = self._get_document_folder(content_hash)
+        self._invalidate_metadata(content_hash)
+        with self._lock:
+            self._audit_buffers.pop(content_hash, None)
+            self._close_audit_file(content_hash)
+            self._mindmap_cache.pop(content_hash, None)
+            self._known_folders.discard(content_hash)
 
         if not folder.exists():
             return False
 
         try:
             shutil.rmtree(folder)
-            logger.info(f"Deleted document folder: {folder}")
+            logger.info("Deleted document folder: %s", folder)
             return True
         except Exception as e:
-            logger.error(f"Failed to delete document folder {folder}: {e}")
+            logger.error("Failed to delete document folder %s: %s", folder, e)
             return False
 
     def _append_audit_log(self, content_hash: str, action: str, details: dict) -> None:
         """
-        Append an entry to the audit log.
+        Buffer an entry for the audit log.
+
+        Entries are written by flush_audit(), which public methods that
+        change a document call before returning, so each operation costs
+        one append however many entries it logs.
 
         Args:
             content_hash: Document content hash
             action: Action name (e.g., "document_created", "mindmap_saved")
             details: Additional details dict
         """
-        folder = self._get_document_folder(content_hash)
-        audit_path = folder / self.AUDIT_FILENAME
-
-        entry = AuditEntry(
-            timestamp=datetime.utcnow().isoformat(),
-            action=action,
-            details=details,
-        )
+        # Validates the hash, through the cache of already resolved folders
+        self._get_document_folder(content_hash)
+
+        # Serialized directly; AuditEntry is only used when reading the log
+        line = orjson.dumps({
+            "timestamp": _now_iso(),
+            "action": action,
+            "details": details,
+        }) + b"\n"
+        with self._lock:
+            buffer = self._audit_buffers.setdefault(content_hash, [])
+            buffer.append(line)
+            if len(buffer) >= self.AUDIT_BUFFER_LIMIT:
+                self.flush_audit(content_hash)
+
+    def flush_audit(self, content_hash: Optional[str] = None) -> None:
+        """
+        Write buffered audit entries to disk.
 
-        try:
-            with open(audit_path, "a") as f:
-                f.write(entry.model_dump_json() + "\n")
-        except Exception as e:
-            logger.warning(f"Failed to write audit log: {e}")
+        Args:
+            content_hash: Document to flush, or None to flush all documents
+        """
+        with self._lock:
+            content_hashes = [content_hash] if content_hash else list(self._audit_buffers)
+
+            for h in content_hashes:
+                lines = self._audit_buffers.pop(h, None)
+                if not lines:
+                    continue
+
+                try:
+                    f = self._audit_file(h)
+                    f.write(b"".join(lines))
+                    f.flush()
+                except Exception as e:
+                    logger.warning("Failed to write audit log: %s", e)
+                    self._close_audit_file(h)
+
+    def close(self) -> None:
+        """Flush buffered audit entries, close open audit logs and stop the listing pool."""
+        with self._lock:
+            self.flush_audit()
+            for content_hash in list(self._audit_files):
+                self._close_audit_file(content_hash)
+            executor, self._list_executor = self._list_executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _audit_file(self, content_hash: str) -> BinaryIO:
+        """Get the open audit log for a document, opening it if needed."""
+        f = self._audit_files.get(content_hash)
+        if f is not None:
+            self._audit_files.move_to_end(content_hash)
+            return f
+
+        audit_path = self._get_document_folder(content_hash) / self.AUDIT_FILENAME
+        f = open(audit_path, "ab")
+        self._audit_files[content_hash] = f
+        if len(self._audit_files) > self.MAX_OPEN_AUDIT_FILES:
+            _, evicted = self._audit_files.popitem(last=False)
+            evicted.close()
+        return f
+
+    def _close_audit_file(self, content_hash: str) -> None:
+        """Close a document's audit log if it is open."""
+        f = self._audit_files.pop(content_hash, None)
+        if f is not None:
+            try:
+                f.close()
+            except OSError as e:
+                logger.warning("Failed to close audit log: %s", e)
 
 
 # Singleton instance
@@ -446,4 +844,12 @@ def get_storage() -> DocumentStorage:
     global _storage
     if _storage is None:
         _storage = DocumentStorage()
+        # Write out audit entries still buffered at shutdown
+        atexit.register(_storage.close)
     return _storage
+
+
+def close_storage() -> None:
+    """Close the singleton DocumentStorage if it was created."""
+    if _storage is not None:
+        _storage.close()
@@ -1,23 +1,51 @@
+import asyncio
+from typing import Optional
+
 import anthropic
 from app.config import get_settings
 from app.logging_config import get_logger
+from app.services.claude_service import get_anthropic_client
 
 settings = get_settings()
 logger = get_logger(__name__)
 
+# Caps concurrent web search calls; extra callers wait their turn
+_search_semaphore = asyncio.Semaphore(settings.search_concurrency)
+
 
 class WebSearchService:
     """Service for web search using Claude's built-in web search tool."""
 
     def __init__(self):
-        self.client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+        # Set only to override the shared client; see the client property
+        self._client: Optional[anthropic.AsyncAnthropic] = None
         self.model = settings.claude_model_search
+        # In-flight searches keyed by (query, max_results)
+        self._inflight: dict[tuple[str, int], asyncio.Task] = {}
+
+    @property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """
+        The Anthropic client, looked up on each use.
+
+        The shared client is not held, so after close_anthropic_client() the
+        service picks up the next client instead of the closed one.
+        """
+        if self._client is not None:
+            return self._client
+        return get_anthropic_client()
+
+    @client.setter
+    def client(self, client) -> None:
+        """Use a specific client instead of the shared one."""
+        self._client = client
 
     async def search(self, query: str, max_results: int = 5) -> list[dict]:
         """
         Search the web for information about a topic using Claude's web search.
 
-        Uses the web search model configured in settings.
+        Uses the web search model configured in settings. Concurrent searches
+        for the same query share one API call.
 
         Args:
             query: Search query string
@@ -26,34 +54,51 @@ class WebSearchService:
         Returns:
             List of search results with title, url, and snippet
         """
+        key = (query, max_results)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._search(query, max_results))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.debug("Joining in-flight web search: '%s'", query)
+
+        # Shielded so one cancelled caller doesn't cancel the search for the others
+        return await asyncio.shield(task)
+
+    async def _search(self, query: str, max_results: int) -> list[dict]:
+        """Run a web search through Claude and parse the results."""
         try:
-            logger.info(f"Web search request: '{query}' (max_results={max_results})")
+            logger.info("Web search request: '%s' (max_results=%s)", query, max_results)
 
             # Use Claude with web search tool enabled
             # Tool type format: web_search_20250305 (as per latest API docs)
-            response = await self.client.messages.create(
-                model=self.model,
-                max_tokens=2048,
-                tools=[
-                    {
-                        "type": "web_search_20250305",
-                        "name": "web_search",
-                        "max_uses": max_results,
-                    }
-                ],
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Search the web for: {query}",
-                    }
-                ],
-            )
-
-            logger.debug(f"Web search response received: {len(response.content)} content blocks")
+            async with _search_semaphore:
+                response = await self.client.messages.create(
+                    model=self.model,
+                    max_tokens=2048,
+                    tools=[
+                        {
+                            "type": "web_search_20250305",
+                            "name": "web_search",
+                            "max_uses": max_results,
+                        }
+                    ],
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"Search the web for: {query}",
+                        }
+                    ],
+                )
+
+            logger.debug("Web search response received: %s content blocks", len(response.content))
 
             # Parse the response to extract search results
             # Response contains: text blocks, server_tool_use blocks, and web_search_tool_result blocks
             results = []
+            # First result for each URL, for matching citations to results
+            by_url: dict[str, dict] = {}
 
             for block in response.content:
                 # Look for web_search_tool_result blocks
@@ -62,20 +107,20 @@ class WebSearchService:
                     if hasattr(block, "content"):
                         # Handle error case
                         if isinstance(block.content, dict) and block.content.get("type") == "web_search_tool_result_error":
-                            logger.warning(f"Web search error: {block.content.get('error_code')}")
+                            logger.warning("Web search error: %s", block.content.get('error_code'))
                             continue
 
                         # Extract results from web_search_result items
                         if isinstance(block.content, list):
                             for result in block.content:
                                 if hasattr(result, "type") and result.type == "web_search_result":
-                                    results.append(
-                                        {
-                                            "title": getattr(result, "title", "") or "",
-                                            "url": getattr(result, "url", "") or "",
-                                            "snippet": getattr(result, "page_age", "") or "",
-                                        }
-                                    )
+                                    entry = {
+                                        "title": getattr(result, "title", "") or "",
+                                        "url": getattr(result, "url", "") or "",
+                                        "snippet": getattr(result, "page_age", "") or "",
+                                    }
+                                    results.append(entry)
+                                    by_url.setdefault(entry["url"], entry)
 
                 # Also extract cited_text from citations in text blocks for snippets
                 if block.type == "text" and hasattr(block, "citations"):
@@ -84,18 +129,17 @@ class WebSearchService:
                             # Update snippet with cited_text if we have a matching URL
                             url = getattr(citation, "url", "")
                             cited_text = getattr(citation, "cited_text", "")
-                            for result in results:
-                                if result["url"] == url and cited_text:
-                                    result["snippet"] = cited_text
-                                    break
+                            result = by_url.get(url)
+                            if result is not None and cited_text:
+                                result["snippet"] = cited_text
 
             # Limit to max_results
-            logger.info(f"Web search complete: {len(results)} results found")
+            logger.info("Web search complete: %s results found", len(results))
             return results[:max_results]
 
         except anthropic.APIError as e:
-            logger.exception(f"Anthropic API error during web search: {e}")
+            logger.exception("Anthropic API error during web search: %s", e)
             return []
         except Exception as e:
-            logger.exception(f"Web search error: {e}")
+            logger.exception("Web search error: %s", e)
             return []
@@ -0,0 +1,63 @@
+"""
+Shared fixtures for backend tests.
+"""
+
+from uuid import uuid4
+
+import pytest
+
+from app.models.mindmap import MindMapNode, NodeType
+from app.services.mindmap_generator import (
+    nodes_store,
+    mindmap_store,
+    document_nodes_store,
+    invalidate_mindmap_payloads,
+)
+
+
+@pytest.fixture
+def mindmap_tree():
+    """
+    Populate the in-memory stores with a small three-level mindmap.
+
+    The tree has a root, two sections and two subsections per section.
+    Yields the document ID and the nodes in depth-first (document) order.
+    """
+    document_id = str(uuid4())
+    nodes = []
+
+    def add_node(title, node_type, depth, parent=None):
+        node = MindMapNode(
+            document_id=document_id,
+            parent_id=parent.id if parent else None,
+            title=title,
+            summary=f"{title} summary",
+            full_content=f"{title} content",
+            node_type=node_type,
+            depth=depth,
+        )
+        if parent:
+            parent.children_ids.append(node.id)
+            parent.has_children = True
+        nodes.append(node)
+        return node
+
+    root = add_node("Root", NodeType.ROOT, 0)
+    for i in range(2):
+        section = add_node(f"Section {i}", NodeType.SECTION, 1, root)
+        for j in range(2):
+            add_node(f"Subsection {i}.{j}", NodeType.SUBSECTION, 2, section)
+
+    for node in nodes:
+        nodes_store[node.id] = node
+    mindmap_store[document_id] = root.id
+    document_nodes_store[document_id] = [node.id for node in nodes]
+    invalidate_mindmap_payloads()
+
+    yield document_id, nodes
+
+    for node in nodes:
+        nodes_store.pop(node.id, None)
+    mindmap_store.pop(document_id, None)
+    document_nodes_store.pop(document_id, None)
+    invalidate_mindmap_payloads()
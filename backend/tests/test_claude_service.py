@@ -0,0 +1,233 @@
+"""
+Tests for the shared Claude service and Anthropic client.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import claude_service
+from app.services.claude_service import (
+    ClaudeService,
+    close_anthropic_client,
+    get_anthropic_client,
+    get_claude_service,
+)
+from app.services.mindmap_generator import MindMapGenerator
+from app.services.qa_service import QAService
+from app.services.web_search import WebSearchService
+
+
+class TestSharedClient:
+    """Tests for sharing one client and service across call sites."""
+
+    def test_services_share_one_client(self):
+        """All services should use the same Anthropic client."""
+        client = get_anthropic_client()
+
+        assert get_claude_service().client is client
+        assert QAService().claude_service is get_claude_service()
+        assert MindMapGenerator().claude_service is get_claude_service()
+        assert WebSearchService().client is client
+
+    def test_client_fails_fast_on_connect(self):
+        """Connecting should time out quickly while long reads are allowed."""
+        client = get_anthropic_client()
+
+        assert client.timeout.connect == 5.0
+        assert client.timeout.read == 600.0
+
+    async def test_close_releases_client(self):
+        """Closing should drop the client so the next call creates a new one."""
+        client = get_anthropic_client()
+
+        await close_anthropic_client()
+
+        assert client.is_closed()
+        assert get_anthropic_client() is not client
+
+    async def test_services_use_new_client_after_close(self):
+        """Long-lived services should not keep using a closed client."""
+        service = get_claude_service()
+        search_service = WebSearchService()
+        client = service.client
+
+        await close_anthropic_client()
+
+        assert not service.client.is_closed()
+        assert service.client is not client
+        assert search_service.client is service.client
+
+    async def test_close_without_client_is_noop(self):
+        """Closing before any client exists should do nothing."""
+        await close_anthropic_client()
+        await close_anthropic_client()
+
+        assert get_anthropic_client.cache_info().currsize == 0
+
+
+class _FakeMessages:
+    """Stand-in for client.messages that returns a fixed reply."""
+
+    def __init__(self, text, delay=0.0):
+        self.text = text
+        self.delay = delay
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return SimpleNamespace(
+            content=[SimpleNamespace(text=self.text)],
+            usage=SimpleNamespace(input_tokens=1, output_tokens=1),
+        )
+
+    def stream(self, **kwargs):
+        return _FakeStream(self.create(**kwargs))
+
+
+class _FakeStream:
+    """Stand-in for a message stream that yields the final message."""
+
+    def __init__(self, message):
+        self._message = message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def get_final_message(self):
+        return await self._message
+
+
+def _service_replying(text, delay=0.0):
+    """Create a ClaudeService whose API calls return text."""
+    service = ClaudeService()
+    service.client = SimpleNamespace(messages=_FakeMessages(text, delay))
+    return service
+
+
+class TestResponseCache:
+    """Tests for caching Claude responses."""
+
+    async def test_repeated_question_is_cached(self):
+        """Asking the same question twice should call the API once."""
+        service = _service_replying("ANSWER: Yes\nCONFIDENCE: 0.9")
+
+        first = await service.answer_question("Is it?", "context")
+        second = await service.answer_question("Is it?", "context")
+
+        assert first == second == {"answer": "Yes", "confidence": 0.9}
+        assert service.client.messages.calls == 1
+        assert service.cache_stats()["hits"] == 1
+
+    async def test_different_context_is_not_shared(self):
+        """The same question over different context should call the API again."""
+        service = _service_replying("ANSWER: Yes\nCONFIDENCE: 0.9")
+
+        await service.answer_question("Is it?", "one")
+        await service.answer_question("Is it?", "two")
+
+        assert service.client.messages.calls == 2
+
+    async def test_concurrent_identical_calls_share_one_request(self):
+        """Concurrent identical requests should wait for a single API call."""
+        service = _service_replying('{"title": "Doc", "children": []}', delay=0.01)
+
+        results = await asyncio.gather(
+            *(service.generate_structure("same text") for _ in range(5))
+        )
+
+        assert all(r == {"title": "Doc", "children": []} for r in results)
+        assert service.client.messages.calls == 1
+        assert service._inflight == {}
+
+    async def test_unparseable_structure_is_not_cached(self):
+        """Fallback structures should not be cached so the next call retries."""
+        service = _service_replying("not json")
+
+        first = await service.generate_structure("text")
+        await service.generate_structure("text")
+
+        assert first["title"] == "Document"
+        assert service.client.messages.calls == 2
+
+    async def test_clear_cache(self):
+        """Clearing the cache should force a new API call."""
+        service = _service_replying("ANSWER: Yes\nCONFIDENCE: 0.9")
+        await service.answer_question("Is it?", "context")
+
+        service.clear_cache()
+        await service.answer_question("Is it?", "context")
+
+        assert service.client.messages.calls == 2
+
+
+class TestConcurrencyLimit:
+    """Tests for capping concurrent API calls."""
+
+    async def test_calls_wait_for_free_slot(self, monkeypatch):
+        """No more than the configured number of calls should run at once."""
+        monkeypatch.setattr(claude_service, "_api_semaphore", asyncio.Semaphore(2))
+        service = _service_replying("ANSWER: Yes\nCONFIDENCE: 0.9", delay=0.01)
+
+        await asyncio.gather(
+            *(service.answer_question(f"Question {i}?", "context") for i in range(6))
+        )
+
+        assert service.client.messages.calls == 6
+        assert service.client.messages.peak == 2
+
+
+class TestStructureParsing:
+    """Tests for parsing the structure reply."""
+
+    async def test_plain_json(self):
+        """A bare JSON reply should be parsed directly."""
+        service = _service_replying('{"title": "Doc", "children": []}')
+
+        assert await service.generate_structure("text") == {"title": "Doc", "children": []}
+
+    async def test_json_wrapped_in_markdown(self):
+        """JSON inside a markdown code block should be extracted."""
+        service = _service_replying('Here it is:\n```json\n{"title": "Doc"}\n```\nDone {really}.')
+
+        assert await service.generate_structure("text") == {"title": "Doc"}
+
+    async def test_invalid_json_falls_back(self):
+        """A broken JSON object should produce the fallback structure."""
+        service = _service_replying('{"title": "Doc",')
+
+        result = await service.generate_structure("text")
+
+        assert result["title"] == "Document"
+        assert result["full_content"] == "text"
+
+
+class TestAnswerParsing:
+    """Tests for parsing the Q&A reply."""
+
+    @pytest.mark.parametrize(
+        "reply, expected",
+        [
+            ("ANSWER: Yes, it does.\nCONFIDENCE: 0.75", {"answer": "Yes, it does.", "confidence": 0.75}),
+            ("ANSWER: Multi\nline\n\nCONFIDENCE: 0.9 - high confidence", {"answer": "Multi\nline", "confidence": 0.9}),
+            ("ANSWER: Sure\nCONFIDENCE: 2", {"answer": "Sure", "confidence": 1.0}),
+            ("ANSWER: No confidence given", {"answer": "No confidence given", "confidence": 0.8}),
+            ("ANSWER: Unclear\nCONFIDENCE: high", {"answer": "Unclear", "confidence": 0.8}),
+            ("Just some text", {"answer": "Just some text", "confidence": 0.8}),
+        ],
+    )
+    async def test_parses_answer_and_confidence(self, reply, expected):
+        """Answer and confidence should be parsed, clamped and defaulted."""
+        service = _service_replying(reply)
+
+        assert await service.answer_question("Question?", "context") == expected
@@ -0,0 +1,488 @@
+"""
+Tests for the document upload routes.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from uuid import UUID, uuid4
+
+from app.api.routes import documents
+from app.api.routes.documents import process_document
+from app.models.document import ProcessingStatus
+from app.models.mindmap import MindMapNode, NodeType
+from app.services.claude_service import STRUCTURE_TEXT_LIMIT
+from app.services.mindmap_generator import (
+    PRECOMPUTED_MINDMAP_DEPTH,
+    _build_mindmap_payload,
+    document_nodes_store,
+    get_mindmap_payload,
+    mindmap_store,
+    nodes_store,
+    warm_mindmap_payloads,
+)
+from app.services.storage import DocumentStorage
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Create a test client with storage and uploads in a temp directory."""
+    storage = DocumentStorage(documents_dir=tmp_path / "documents")
+
+    monkeypatch.setattr(documents, "get_storage", lambda: storage)
+    monkeypatch.setattr(documents, "process_document", _noop_process)
+
+    app = FastAPI()
+    app.include_router(documents.router, prefix="/documents")
+    test_client = TestClient(app)
+    test_client.storage = storage
+    yield test_client
+
+    for store in (
+        nodes_store,
+        mindmap_store,
+        document_nodes_store,
+        documents.documents_store,
+        documents.doc_id_to_hash,
+    ):
+        store.clear()
+    storage.close()
+
+
+async def _noop_process(content_hash):
+    """Stand-in for the background processing task."""
+
+
+def _store_document(storage, content_hash, child_count=2):
+    """Persist a small mindmap for a document and return its ID and nodes."""
+    document_id = str(uuid4())
+    root = MindMapNode(
+        document_id=document_id,
+        title="Root",
+        summary="Root summary",
+        node_type=NodeType.ROOT,
+        depth=0,
+    )
+    children = [
+        MindMapNode(
+            document_id=document_id,
+            parent_id=root.id,
+            title=f"Child {i}",
+            summary=f"Child {i} summary",
+            node_type=NodeType.SECTION,
+            depth=1,
+        )
+        for i in range(child_count)
+    ]
+    root.children_ids = [child.id for child in children]
+    root.has_children = bool(children)
+    nodes = [root, *children]
+
+    folder = storage.documents_dir / content_hash
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / storage.PDF_FILENAME).write_bytes(b"%PDF")
+    storage.save_mindmap(
+        content_hash=content_hash,
+        document_id=document_id,
+        original_filename="stored.pdf",
+        page_count=1,
+        root_node_id=root.id,
+        nodes=nodes,
+    )
+    return document_id, nodes
+
+
+class TestUploadDocument:
+    """Tests for the upload endpoint."""
+
+    def test_rejects_non_pdf(self, client):
+        """Non-PDF filenames should be rejected."""
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("notes.txt", b"hello", "text/plain")},
+        )
+        assert response.status_code == 400
+
+    def test_rejects_oversized_upload(self, client, monkeypatch):
+        """Uploads over the size limit should be rejected without writing anything."""
+        monkeypatch.setattr(documents.settings, "max_upload_size", documents.UPLOAD_CHUNK_SIZE + 1024)
+        content = b"x" * (3 * documents.UPLOAD_CHUNK_SIZE)
+
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("big.pdf", content, "application/pdf")},
+        )
+
+        assert response.status_code == 413
+        assert not any(p.is_dir() for p in client.storage.documents_dir.iterdir())
+
+    def test_accepts_upload_at_limit(self, client, monkeypatch):
+        """Uploads spanning several chunks but within the limit should be stored."""
+        monkeypatch.setattr(documents.settings, "max_upload_size", 3 * documents.UPLOAD_CHUNK_SIZE)
+        content = b"%PDF" + b"x" * (2 * documents.UPLOAD_CHUNK_SIZE + 1024)
+
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", content, "application/pdf")},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["original_filename"] == "doc.pdf"
+        assert data["status"] == "pending"
+
+        content_hash = next(p.name for p in client.storage.documents_dir.iterdir() if p.is_dir())
+        stored_pdf = client.storage.get_pdf_path(content_hash)
+        assert stored_pdf.read_bytes() == content
+        assert client.storage.compute_content_hash(stored_pdf) == content_hash
+
+    def test_reupload_loads_existing_document(self, client):
+        """Re-uploading a stored document should return it without reprocessing."""
+        content = b"%PDF-1.4 stored document"
+        first = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", content, "application/pdf")},
+        ).json()
+
+        content_hash = next(p.name for p in client.storage.documents_dir.iterdir() if p.is_dir())
+        client.storage.save_mindmap(
+            content_hash=content_hash,
+            document_id=first["id"],
+            original_filename="doc.pdf",
+            page_count=1,
+            root_node_id="root",
+            nodes=[],
+        )
+        # Simulate a server restart so the document is only in storage
+        documents.documents_store.clear()
+        documents.doc_id_to_hash.clear()
+
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("copy.pdf", content, "application/pdf")},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == first["id"]
+        assert data["status"] == "completed"
+
+    def test_reupload_while_processing_returns_same_document(self, client):
+        """Re-uploading a document that is still processing should not start another run."""
+        content = b"%PDF-1.4 processing document"
+        first = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", content, "application/pdf")},
+        ).json()
+
+        second = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", content, "application/pdf")},
+        ).json()
+
+        assert second["id"] == first["id"]
+        assert second["status"] == "pending"
+        assert len(documents.documents_store) == 1
+
+    def test_pdf_is_written_outside_store_lock(self, client, monkeypatch):
+        """Writing the PDF shouldn't hold up other documents' store updates."""
+        write = client.storage.create_document_folder_from_fileobj
+        seen = {}
+
+        def recording_write(content_hash, source):
+            seen["store_locked"] = documents._store_lock.locked()
+            seen["status"] = documents.documents_store[content_hash].status
+            return write(content_hash, source)
+
+        monkeypatch.setattr(client.storage, "create_document_folder_from_fileobj", recording_write)
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", b"%PDF-1.4 unlocked write", "application/pdf")},
+        )
+
+        assert response.status_code == 200
+        assert seen == {"store_locked": False, "status": ProcessingStatus.PENDING}
+
+    def test_failed_write_releases_reservation(self, client, monkeypatch):
+        """A PDF that can't be written should not leave a pending record behind."""
+        def failing_write(content_hash, source):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(client.storage, "create_document_folder_from_fileobj", failing_write)
+        response = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", b"%PDF-1.4 failed write", "application/pdf")},
+        )
+
+        assert response.status_code == 500
+        assert documents.documents_store == {}
+        assert documents.doc_id_to_hash == {}
+
+
+class TestLoadAndDeleteDocument:
+    """Tests for restoring documents into memory and removing them."""
+
+    def test_load_indexes_nodes_by_document(self, client):
+        """Loading a document should index all of its nodes under its ID."""
+        document_id, nodes = _store_document(client.storage, "a1b2c3d4e5f67890")
+
+        response = client.get("/documents/a1b2c3d4e5f67890/load")
+
+        assert response.status_code == 200
+        assert document_nodes_store[str(document_id)] == [n.id for n in nodes]
+        assert all(n.id in nodes_store for n in nodes)
+
+    def test_restore_keeps_other_documents_warm_payloads(self, client):
+        """Restoring one document should not evict another's warmed payloads."""
+        first_id, _ = _store_document(client.storage, "a1b2c3d4e5f67890")
+        _store_document(client.storage, "0987654321fedcba")
+        client.get("/documents/a1b2c3d4e5f67890/load")
+        warm_mindmap_payloads(first_id)
+        warmed = [get_mindmap_payload(first_id, depth) for depth in range(PRECOMPUTED_MINDMAP_DEPTH + 1)]
+        hits = _build_mindmap_payload.cache_info().hits
+
+        client.get("/documents/0987654321fedcba/load")
+
+        assert [get_mindmap_payload(first_id, depth) for depth in range(PRECOMPUTED_MINDMAP_DEPTH + 1)] == warmed
+        assert _build_mindmap_payload.cache_info().hits == hits + len(warmed)
+
+    def test_delete_removes_only_that_documents_nodes(self, client):
+        """Deleting a document should drop its nodes and leave others intact."""
+        deleted_id, deleted_nodes = _store_document(client.storage, "a1b2c3d4e5f67890")
+        kept_id, kept_nodes = _store_document(client.storage, "0987654321fedcba")
+        client.get("/documents/a1b2c3d4e5f67890/load")
+        client.get("/documents/0987654321fedcba/load")
+
+        response = client.delete("/documents/a1b2c3d4e5f67890")
+
+        assert response.status_code == 200
+        assert deleted_id not in document_nodes_store
+        assert deleted_id not in mindmap_store
+        assert not any(n.id in nodes_store for n in deleted_nodes)
+        assert all(n.id in nodes_store for n in kept_nodes)
+        assert kept_id in mindmap_store
+
+    def test_document_lookup_by_id_follows_load_and_delete(self, client):
+        """Documents should be reachable by ID once loaded and gone after deletion."""
+        document_id, _ = _store_document(client.storage, "a1b2c3d4e5f67890")
+        client.get("/documents/a1b2c3d4e5f67890/load")
+
+        response = client.get(f"/documents/{document_id}")
+        assert response.status_code == 200
+        assert response.json()["status"] == "completed"
+
+        client.delete("/documents/a1b2c3d4e5f67890")
+
+        assert client.get(f"/documents/{document_id}").status_code == 404
+        assert "a1b2c3d4e5f67890" not in documents.documents_store
+
+
+class TestDocumentStatus:
+    """Tests for the status polling endpoint."""
+
+    def test_status_of_uploaded_document(self, client):
+        """Status should report the document state and disable caching."""
+        uploaded = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", b"%PDF-1.4 status", "application/pdf")},
+        ).json()
+
+        response = client.get(f"/documents/{uploaded['id']}/status")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "id": uploaded["id"],
+            "status": "pending",
+            "error_message": None,
+            "progress": None,
+        }
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["etag"].startswith('W/"pending-')
+
+    def test_unchanged_status_returns_304(self, client):
+        """Polling with the current ETag should return an empty 304."""
+        uploaded = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", b"%PDF-1.4 etag", "application/pdf")},
+        ).json()
+        etag = client.get(f"/documents/{uploaded['id']}/status").headers["etag"]
+
+        response = client.get(
+            f"/documents/{uploaded['id']}/status",
+            headers={"If-None-Match": etag},
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+    def test_changed_status_returns_new_body(self, client):
+        """A status change should invalidate the previous ETag."""
+        uploaded = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", b"%PDF-1.4 etag change", "application/pdf")},
+        ).json()
+        etag = client.get(f"/documents/{uploaded['id']}/status").headers["etag"]
+
+        document = documents._get_document_by_id(UUID(uploaded["id"]))
+        document.status = ProcessingStatus.FAILED
+        document.error_message = "boom"
+        response = client.get(
+            f"/documents/{uploaded['id']}/status",
+            headers={"If-None-Match": etag},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "failed"
+        assert response.headers["etag"] != etag
+
+    def test_status_of_unknown_document(self, client):
+        """Unknown documents should return 404."""
+        response = client.get("/documents/00000000-0000-0000-0000-000000000000/status")
+        assert response.status_code == 404
+
+
+class TestListEndpoints:
+    """Tests for the document list and audit log endpoints."""
+
+    def test_list_documents(self, client):
+        """Stored documents should be listed with their metadata."""
+        document_id, _ = _store_document(client.storage, "a1b2c3d4e5f67890")
+
+        response = client.get("/documents/")
+
+        assert response.status_code == 200
+        [item] = response.json()
+        assert item["content_hash"] == "a1b2c3d4e5f67890"
+        assert item["document_id"] == document_id
+        assert item["original_filename"] == "stored.pdf"
+        assert item["page_count"] == 1
+
+    def test_audit_log_requires_debug(self, client, monkeypatch):
+        """The audit log should only be served in debug mode."""
+        _store_document(client.storage, "a1b2c3d4e5f67890")
+        monkeypatch.setattr(documents.settings, "debug", False)
+
+        assert client.get("/documents/a1b2c3d4e5f67890/audit").status_code == 403
+
+    def test_audit_log_newest_first(self, client, monkeypatch):
+        """Audit entries should be returned newest first."""
+        _store_document(client.storage, "a1b2c3d4e5f67890")
+        client.get("/documents/a1b2c3d4e5f67890/load")
+        monkeypatch.setattr(documents.settings, "debug", True)
+
+        response = client.get("/documents/a1b2c3d4e5f67890/audit")
+
+        assert response.status_code == 200
+        assert [entry["action"] for entry in response.json()] == ["mindmap_loaded", "mindmap_saved"]
+
+    def test_audit_log_limit(self, client, monkeypatch):
+        """A limit should return only the newest entries."""
+        _store_document(client.storage, "a1b2c3d4e5f67890")
+        client.get("/documents/a1b2c3d4e5f67890/load")
+        monkeypatch.setattr(documents.settings, "debug", True)
+
+        response = client.get("/documents/a1b2c3d4e5f67890/audit", params={"limit": 1})
+
+        assert [entry["action"] for entry in response.json()] == ["mindmap_loaded"]
+
+
+class TestProcessDocument:
+    """Tests for the background processing task."""
+
+    @pytest.fixture
+    def uploaded(self, client, monkeypatch):
+        """Upload a document and stub out PDF extraction and generation."""
+        content = b"%PDF-1.4 to process"
+        uploaded = client.post(
+            "/documents/upload",
+            files={"file": ("doc.pdf", content, "application/pdf")},
+        ).json()
+        content_hash = documents.doc_id_to_hash[UUID(uploaded["id"])]
+
+        class FakePDFProcessor:
+            async def extract_text(self, file_path):
+                return {"text": "text", "pages": [], "page_count": 1}
+
+        class FakeGenerator:
+            on_generate = None
+            extracted_data = None
+
+            async def generate_mindmap(self, document_id, extracted_data):
+                FakeGenerator.extracted_data = extracted_data
+                doc_id_str = str(document_id)
+                root = MindMapNode(
+                    document_id=doc_id_str,
+                    title="Root",
+                    summary="Root summary",
+                    node_type=NodeType.ROOT,
+                    depth=0,
+                )
+                nodes_store[root.id] = root
+                document_nodes_store[doc_id_str] = [root.id]
+                mindmap_store[doc_id_str] = root.id
+                if FakeGenerator.on_generate:
+                    FakeGenerator.on_generate()
+                return root.id
+
+        monkeypatch.setattr(documents, "pdf_processor", FakePDFProcessor())
+        monkeypatch.setattr(documents, "mindmap_generator", FakeGenerator())
+        return content_hash, uploaded["id"], FakeGenerator
+
+    async def test_completes_and_saves(self, client, uploaded):
+        """Processing should save the mind-map and mark the document completed."""
+        content_hash, document_id, _ = uploaded
+
+        await process_document(content_hash)
+
+        assert documents.documents_store[content_hash].status == "completed"
+        assert client.storage.document_exists(content_hash)
+        assert document_id in mindmap_store
+
+    async def test_saves_outside_store_lock(self, client, uploaded, monkeypatch):
+        """Saving the mind-map shouldn't hold up other documents' store updates."""
+        content_hash, _, _ = uploaded
+        asave_mindmap = client.storage.asave_mindmap
+        seen = []
+
+        async def recording_asave(**kwargs):
+            seen.append(documents._store_lock.locked())
+            await asave_mindmap(**kwargs)
+
+        monkeypatch.setattr(client.storage, "asave_mindmap", recording_asave)
+        await process_document(content_hash)
+
+        assert seen == [False]
+        assert documents.documents_store[content_hash].status == "completed"
+
+    async def test_passes_only_leading_text_to_generator(self, uploaded, monkeypatch):
+        """Only the text Claude will see should be handed to the generator."""
+        content_hash, _, generator = uploaded
+
+        class LongPDFProcessor:
+            async def extract_text(self, file_path):
+                text = "x" * (STRUCTURE_TEXT_LIMIT + 100)
+                return {"text": text, "pages": [{"page_number": 1, "text": text}], "page_count": 1}
+
+        monkeypatch.setattr(documents, "pdf_processor", LongPDFProcessor())
+
+        await process_document(content_hash)
+
+        assert generator.extracted_data == {"text": "x" * STRUCTURE_TEXT_LIMIT}
+
+    async def test_discards_result_if_deleted_during_processing(self, client, uploaded):
+        """A document deleted mid-processing should not be saved or left in memory."""
+        content_hash, document_id, generator = uploaded
+
+        def delete_document():
+            documents.documents_store.pop(content_hash)
+            client.storage.delete_document(content_hash)
+
+        generator.on_generate = delete_document
+
+        await process_document(content_hash)
+
+        assert not (client.storage.documents_dir / content_hash).exists()
+        assert document_id not in mindmap_store
+        assert document_id not in document_nodes_store
@@ -0,0 +1,265 @@
+"""
+Tests for the mind-map and Q&A routes over the in-memory node stores.
+"""
+
+import json
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import mindmap, qa
+from app.models.mindmap import MindMapResponse
+from app.services.mindmap_generator import (
+    MindMapGenerator,
+    document_nodes_store,
+    drop_document_nodes,
+    mindmap_store,
+    nodes_store,
+    _build_mindmap_payload,
+    get_mindmap_payload,
+    invalidate_mindmap_payloads,
+    warm_mindmap_payloads,
+)
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the mind-map and Q&A routers."""
+    app = FastAPI()
+    app.include_router(mindmap.router, prefix="/mindmap")
+    app.include_router(qa.router, prefix="/qa")
+    return TestClient(app)
+
+
+class TestGetMindMap:
+    """Tests for the mind-map endpoint."""
+
+    def test_unknown_document_returns_404(self, client):
+        """Requesting an unknown document should return 404."""
+        response = client.get("/mindmap/00000000-0000-0000-0000-000000000000")
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize("depth,expected_count", [(0, 1), (1, 3), (2, 7), (10, 7)])
+    def test_depth_limits_returned_nodes(self, client, mindmap_tree, depth, expected_count):
+        """Only nodes within the requested depth should be returned."""
+        document_id, nodes = mindmap_tree
+
+        response = client.get(f"/mindmap/{document_id}", params={"depth": depth})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["root_id"] == nodes[0].id
+        assert len(data["nodes"]) == expected_count
+        assert all(n["depth"] <= depth for n in data["nodes"])
+
+    def test_full_content_only_on_root(self, client, mindmap_tree):
+        """Full content should only be included for the root node."""
+        document_id, nodes = mindmap_tree
+
+        data = client.get(f"/mindmap/{document_id}", params={"depth": 2}).json()
+
+        by_id = {n["id"]: n for n in data["nodes"]}
+        assert by_id[nodes[0].id]["full_content"] == "Root content"
+        assert all(n["full_content"] is None for n in data["nodes"] if n["id"] != nodes[0].id)
+
+
+class TestMindMapPayloadCache:
+    """Tests for the cached mind-map payloads."""
+
+    def test_payload_is_cached_per_depth(self, mindmap_tree):
+        """Repeated requests for the same depth should reuse the payload."""
+        document_id, _ = mindmap_tree
+
+        first = get_mindmap_payload(document_id, 1)
+
+        assert get_mindmap_payload(document_id, 1) is first
+        assert get_mindmap_payload(document_id, 2) is not first
+
+    def test_payload_matches_response_model(self, mindmap_tree):
+        """The payload should be exactly what MindMapResponse would serialize."""
+        document_id, _ = mindmap_tree
+
+        payload = get_mindmap_payload(document_id, 2)
+
+        response = MindMapResponse.model_validate_json(payload)
+        assert json.loads(payload) == json.loads(response.model_dump_json())
+
+    def test_warm_prebuilds_payloads(self, mindmap_tree):
+        """Warming should populate the cache for the precomputed depths."""
+        document_id, _ = mindmap_tree
+
+        warm_mindmap_payloads(document_id)
+
+        assert _build_mindmap_payload.cache_info().currsize == 3
+
+    def test_invalidate_rebuilds_payload(self, client, mindmap_tree):
+        """Invalidating should pick up changes to the node stores."""
+        document_id, nodes = mindmap_tree
+        client.get(f"/mindmap/{document_id}")
+
+        nodes[0].title = "Renamed root"
+        invalidate_mindmap_payloads()
+
+        data = client.get(f"/mindmap/{document_id}").json()
+        assert data["nodes"][0]["title"] == "Renamed root"
+
+    def test_invalidating_one_document_keeps_others(self, mindmap_tree):
+        """Invalidating a document should only rebuild that document's payloads."""
+        document_id, _ = mindmap_tree
+        payload = get_mindmap_payload(document_id, 1)
+
+        invalidate_mindmap_payloads(str(uuid4()))
+        assert get_mindmap_payload(document_id, 1) is payload
+
+        invalidate_mindmap_payloads(document_id)
+        assert get_mindmap_payload(document_id, 1) is not payload
+
+
+class TestCalculatePositions:
+    """Tests for the radial node layout."""
+
+    def test_radial_layout(self, mindmap_tree):
+        """Children should be spaced around their parent, further out at depth."""
+        _, nodes = mindmap_tree
+        root, section0, sub00, sub01, section1, sub10, sub11 = nodes
+
+        MindMapGenerator()._calculate_positions(root.id)
+
+        def position(node):
+            return pytest.approx((node.position_x, node.position_y), abs=1e-9)
+
+        assert position(root) == (0, 0)
+        assert position(section0) == (0, -200)
+        assert position(section1) == (0, 200)
+        assert position(sub00) == (0, -500)
+        assert position(sub01) == (0, 100)
+        assert position(sub10) == (0, -100)
+        assert position(sub11) == (0, 500)
+
+
+class _FakeClaudeService:
+    """Stand-in for ClaudeService that returns a fixed structure."""
+
+    async def generate_structure(self, document_text):
+        # Parsed from JSON, like a real reply, so equal strings are distinct objects
+        return json.loads("""{
+            "title": "Doc",
+            "summary": "Doc summary",
+            "children": [
+                {"title": "Intro", "key_concepts": ["shared"], "children": [{"title": "Background"}]},
+                {"title": "Body", "key_concepts": ["shared", "body"]}
+            ]
+        }""")
+
+
+class TestGenerateMindMap:
+    """Tests for building nodes from a generated structure."""
+
+    async def test_nodes_are_stored_and_linked(self):
+        """Nodes should be stored by string ID and indexed in document order."""
+        document_id = uuid4()
+        generator = MindMapGenerator()
+        generator.claude_service = _FakeClaudeService()
+
+        root_id = await generator.generate_mindmap(document_id, {"text": "text"})
+
+        try:
+            doc_id_str = str(document_id)
+            node_ids = document_nodes_store[doc_id_str]
+            titles = [nodes_store[nid].title for nid in node_ids]
+            assert titles == ["Doc", "Intro", "Background", "Body"]
+            assert mindmap_store[doc_id_str] == root_id == node_ids[0]
+
+            root = nodes_store[root_id]
+            assert all(isinstance(cid, str) for cid in root.children_ids)
+            assert [nodes_store[cid].parent_id for cid in root.children_ids] == [root_id, root_id]
+            assert nodes_store[node_ids[2]].parent_id == node_ids[1]
+        finally:
+            for nid in document_nodes_store.pop(str(document_id), []):
+                nodes_store.pop(nid, None)
+            mindmap_store.pop(str(document_id), None)
+
+    async def test_key_concepts_are_interned(self):
+        """Repeated key concepts should share a single string object."""
+        document_id = uuid4()
+        generator = MindMapGenerator()
+        generator.claude_service = _FakeClaudeService()
+
+        await generator.generate_mindmap(document_id, {"text": "text"})
+
+        try:
+            node_ids = document_nodes_store[str(document_id)]
+            intro, body = nodes_store[node_ids[1]], nodes_store[node_ids[3]]
+            assert intro.key_concepts == ["shared"]
+            assert body.key_concepts == ["shared", "body"]
+            assert intro.key_concepts[0] is body.key_concepts[0]
+        finally:
+            drop_document_nodes(str(document_id))
+
+    async def test_regenerating_replaces_nodes(self):
+        """Generating again for a document should drop its earlier nodes."""
+        document_id = uuid4()
+        generator = MindMapGenerator()
+        generator.claude_service = _FakeClaudeService()
+        store_size = len(nodes_store)
+
+        first_root = await generator.generate_mindmap(document_id, {"text": "text"})
+        second_root = await generator.generate_mindmap(document_id, {"text": "text"})
+
+        try:
+            assert first_root not in nodes_store
+            assert len(nodes_store) == store_size + 4
+            assert mindmap_store[str(document_id)] == second_root
+        finally:
+            drop_document_nodes(str(document_id))
+
+        assert len(nodes_store) == store_size
+        assert str(document_id) not in document_nodes_store
+
+
+class TestAskQuestion:
+    """Tests for how Q&A builds its context from the mind-map."""
+
+    @pytest.fixture
+    def captured_context(self, monkeypatch):
+        """Replace the QA service and capture the context it receives."""
+        captured = {}
+
+        async def fake_answer(question, context):
+            captured["context"] = context
+            return {"answer": "answer", "confidence": 0.5}
+
+        monkeypatch.setattr(qa.qa_service, "answer_question", fake_answer)
+        return captured
+
+    def test_document_context_keeps_document_order_on_ties(self, client, mindmap_tree, captured_context):
+        """With no matching words, context should list nodes in depth-first order."""
+        document_id, nodes = mindmap_tree
+
+        response = client.post(f"/qa/{document_id}", json={"question": "Why?"})
+
+        assert response.status_code == 200
+        titles = [line[3:] for line in captured_context["context"].splitlines() if line.startswith("## ")]
+        assert titles == [node.title for node in nodes]
+        assert response.json()["source_nodes"] == [node.id for node in nodes[:5]]
+
+    def test_document_context_ranks_relevant_nodes_first(self, client, mindmap_tree, captured_context):
+        """Nodes mentioning the question's words should come first."""
+        document_id, nodes = mindmap_tree
+        nodes[5].key_concepts = ["corrigibility"]
+
+        response = client.post(f"/qa/{document_id}", json={"question": "What is corrigibility?"})
+
+        assert response.json()["source_nodes"][0] == nodes[5].id
+        assert captured_context["context"].startswith(f"## {nodes[5].title}\n")
+
+    def test_document_context_is_capped(self, client, mindmap_tree, captured_context, monkeypatch):
+        """Whole-document context should include at most MAX_CONTEXT_NODES nodes."""
+        document_id, _ = mindmap_tree
+        monkeypatch.setattr(qa, "MAX_CONTEXT_NODES", 3)
+
+        client.post(f"/qa/{document_id}", json={"question": "Why?"})
+
+        assert captured_context["context"].count("## ") == 3
@@ -0,0 +1,67 @@
+"""
+Tests for the node routes over the in-memory node stores.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import nodes
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the node router."""
+    app = FastAPI()
+    app.include_router(nodes.router, prefix="/nodes")
+    return TestClient(app)
+
+
+class TestGetNode:
+    """Tests for fetching a single node."""
+
+    def test_returns_node_fields(self, client, mindmap_tree):
+        """The response should mirror the stored node."""
+        _, tree = mindmap_tree
+        root = tree[0]
+
+        response = client.get(f"/nodes/{root.id}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["id"] == root.id
+        assert data["title"] == root.title
+        assert data["node_type"] == root.node_type.value
+        assert data["children_ids"] == root.children_ids
+        assert data["has_children"] is True
+        assert data["full_content"] == "Root content"
+
+    def test_unknown_node_returns_404(self, client):
+        """Unknown nodes should return 404."""
+        response = client.get("/nodes/00000000-0000-0000-0000-000000000000")
+        assert response.status_code == 404
+
+
+class TestExpandNode:
+    """Tests for expanding a node."""
+
+    def test_returns_children_without_content(self, client, mindmap_tree):
+        """Children should be returned in order without their full content."""
+        _, tree = mindmap_tree
+        root = tree[0]
+
+        response = client.post(f"/nodes/{root.id}/expand")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["node"]["full_content"] == "Root content"
+        assert [c["id"] for c in data["children"]] == root.children_ids
+        assert all(c["full_content"] is None for c in data["children"])
+
+    def test_content_can_be_excluded(self, client, mindmap_tree):
+        """include_content=False should omit the node's full content."""
+        _, tree = mindmap_tree
+
+        response = client.post(f"/nodes/{tree[0].id}/expand", json={"include_content": False})
+
+        assert response.json()["node"]["full_content"] is None
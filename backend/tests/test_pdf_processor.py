@@ -0,0 +1,52 @@
+"""
+Tests for PDF text extraction.
+"""
+
+import fitz
+import pytest
+
+from app.services.pdf_processor import PDFProcessor
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    """Write a three-page PDF with one line of text per page."""
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for i in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Page {i + 1} text", fontsize=16 if i == 0 else 11)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+class TestExtractText:
+    """Tests for PDFProcessor.extract_text."""
+
+    async def test_extracts_pages_and_full_text(self, sample_pdf):
+        """Each page should be returned, and the full text should join them."""
+        result = await PDFProcessor().extract_text(str(sample_pdf))
+
+        assert result["page_count"] == 3
+        assert [p["page_number"] for p in result["pages"]] == [1, 2, 3]
+        assert "Page 2 text" in result["pages"][1]["text"]
+        assert result["text"] == "\n\n".join(p["text"] for p in result["pages"])
+
+    async def test_missing_file_raises(self, tmp_path):
+        """A missing file should raise FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            await PDFProcessor().extract_text(str(tmp_path / "missing.pdf"))
+
+
+class TestExtractWithStructure:
+    """Tests for PDFProcessor.extract_with_structure."""
+
+    async def test_reports_page_count_and_headers(self, sample_pdf):
+        """Page count should be reported and large text marked as a header."""
+        result = await PDFProcessor().extract_with_structure(str(sample_pdf))
+
+        assert result["page_count"] == 3
+        assert result["structured_content"][0]["type"] == "header"
+        assert result["structured_content"][1]["type"] == "paragraph"
+
@@ -4,12 +4,19 @@ Tests for the document storage service.
 Includes security tests for path traversal prevention.
 """
 
+import hashlib
+import io
+import json
 import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
 
-from app.services.storage import DocumentStorage
+from app.models.mindmap import MindMapNode, NodeType
+from app.services.storage import DocumentStorage, PersistedMindMap, _now_iso
 
 
 @pytest.fixture
@@ -18,6 +25,7 @@ def temp_storage():
     with tempfile.TemporaryDirectory() as tmpdir:
         storage = DocumentStorage(documents_dir=Path(tmpdir))
         yield storage
+        storage.close()
 
 
 class TestContentHashValidation:
@@ -98,6 +106,54 @@ class TestContentHashValidation:
         with pytest.raises(ValueError, match="Invalid content hash format"):
             temp_storage._get_document_folder("a1b2c3d4\x00e5f678")
 
+    def test_trailing_newline_rejected(self, temp_storage):
+        """A valid hash followed by a newline should be rejected."""
+        with pytest.raises(ValueError, match="Invalid content hash format"):
+            temp_storage._get_document_folder("a1b2c3d4e5f67890\n")
+
+
+class TestDocumentFolder:
+    """Tests for resolving document folders."""
+
+    def test_folder_is_reused(self, temp_storage):
+        """A hash seen before should resolve to the same Path object."""
+        folder = temp_storage._get_document_folder("a1b2c3d4e5f67890")
+
+        assert folder == temp_storage.documents_dir / "a1b2c3d4e5f67890"
+        assert temp_storage._get_document_folder("a1b2c3d4e5f67890") is folder
+
+    def test_audit_appends_skip_revalidation(self, temp_storage, monkeypatch):
+        """Audit appends for a known document should not rerun the hash check."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        validate = temp_storage._validate_content_hash
+        calls = []
+        monkeypatch.setattr(temp_storage, "_validate_content_hash", lambda h: calls.append(h) or validate(h))
+
+        temp_storage._append_audit_log(content_hash, "mindmap_loaded", {})
+
+        assert calls == []
+
+    def test_audit_append_rejects_invalid_hash(self, temp_storage):
+        """Audit appends should still reject malformed hashes."""
+        with pytest.raises(ValueError, match="Invalid content hash format"):
+            temp_storage._append_audit_log("../etc/passwd", "mindmap_loaded", {})
+
+    def test_invalid_hash_is_not_remembered(self, temp_storage):
+        """Rejected hashes should be rejected every time."""
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Invalid content hash format"):
+                temp_storage._get_document_folder("../etc/passwd")
+
+    def test_cache_is_bounded(self, temp_storage, monkeypatch):
+        """Remembered folders should never exceed FOLDER_CACHE_SIZE."""
+        monkeypatch.setattr(temp_storage, "FOLDER_CACHE_SIZE", 2)
+
+        for content_hash in ("a1b2c3d4e5f67890", "b1b2c3d4e5f67890", "c1b2c3d4e5f67890"):
+            temp_storage._get_document_folder(content_hash)
+
+        assert len(temp_storage._folders) <= 2
+
 
 class TestDocumentExists:
     """Tests for document_exists method with hash validation."""
@@ -165,3 +221,530 @@ class TestComputeContentHash:
             Path(f2.name).unlink()
 
         assert hash1 != hash2
+
+    def test_hash_is_truncated_sha256(self, temp_storage, tmp_path):
+        """Hashes must stay truncated SHA-256 so stored documents keep their addresses."""
+        path = tmp_path / "doc.pdf"
+        path.write_bytes(b"test content")
+
+        expected = hashlib.sha256(b"test content").hexdigest()[:16]
+        assert temp_storage.compute_content_hash(path) == expected
+
+    def test_incremental_hash_matches_file_hash(self, temp_storage):
+        """Hashing chunks incrementally should match hashing the whole file."""
+        content = b"chunked content " * 10000
+
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(content)
+            f.flush()
+            file_hash = temp_storage.compute_content_hash(Path(f.name))
+            Path(f.name).unlink()
+
+        hasher = temp_storage.new_content_hasher()
+        for i in range(0, len(content), 4096):
+            hasher.update(content[i:i + 4096])
+
+        assert temp_storage.content_hash_from_hasher(hasher) == file_hash
+
+
+def _save_empty_mindmap(storage, content_hash, filename="doc.pdf"):
+    """Save a mindmap with no nodes for the given hash."""
+    storage.save_mindmap(
+        content_hash=content_hash,
+        document_id="doc-id",
+        original_filename=filename,
+        page_count=1,
+        root_node_id="root",
+        nodes=[],
+    )
+
+
+class TestMetadataCache:
+    """Tests for cached document_exists and list_documents results."""
+
+    def test_document_exists_sees_saved_mindmap(self, temp_storage):
+        """A cached negative result should be dropped when a mindmap is saved."""
+        content_hash = "a1b2c3d4e5f67890"
+        assert temp_storage.document_exists(content_hash) is False
+
+        _save_empty_mindmap(temp_storage, content_hash)
+
+        assert temp_storage.document_exists(content_hash) is True
+
+    def test_document_exists_sees_delete(self, temp_storage):
+        """A cached positive result should be dropped when a document is deleted."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        assert temp_storage.document_exists(content_hash) is True
+
+        temp_storage.delete_document(content_hash)
+
+        assert temp_storage.document_exists(content_hash) is False
+
+    def test_document_exists_is_cached(self, temp_storage):
+        """Repeated checks should not hit the filesystem within the TTL."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        assert temp_storage.document_exists(content_hash) is True
+
+        # Removed behind the storage's back: still cached until the TTL expires
+        (temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME).unlink()
+        assert temp_storage.document_exists(content_hash) is True
+
+        temp_storage._exists_cache.expire(time.monotonic() + temp_storage.METADATA_CACHE_TTL)
+        assert temp_storage.document_exists(content_hash) is False
+
+    def test_document_exists_cache_is_bounded(self, temp_storage):
+        """Probing many unknown hashes should not grow the cache without limit."""
+        for i in range(temp_storage.EXISTS_CACHE_SIZE + 100):
+            assert temp_storage.document_exists(f"{i:016x}") is False
+
+        assert len(temp_storage._exists_cache) == temp_storage.EXISTS_CACHE_SIZE
+
+    def test_list_documents_ignores_save_during_scan(self, temp_storage, monkeypatch):
+        """A listing that overlaps a save should not cache its stale result."""
+        _save_empty_mindmap(temp_storage, "a1b2c3d4e5f67890", "one.pdf")
+        read_document_info = temp_storage._read_document_info
+
+        def save_during_scan(content_hash, folder):
+            monkeypatch.setattr(temp_storage, "_read_document_info", read_document_info)
+            _save_empty_mindmap(temp_storage, "0987654321fedcba", "two.pdf")
+            return read_document_info(content_hash, folder)
+
+        monkeypatch.setattr(temp_storage, "_read_document_info", save_during_scan)
+        assert [d.original_filename for d in temp_storage.list_documents()] == ["one.pdf"]
+
+        assert {d.original_filename for d in temp_storage.list_documents()} == {"one.pdf", "two.pdf"}
+
+    def test_document_exists_ignores_save_during_check(self, temp_storage, monkeypatch):
+        """A negative check that overlaps a save should not be cached."""
+        content_hash = "a1b2c3d4e5f67890"
+        path_exists = Path.exists
+
+        def save_during_check(path):
+            monkeypatch.setattr(Path, "exists", path_exists)
+            _save_empty_mindmap(temp_storage, content_hash)
+            return False
+
+        monkeypatch.setattr(Path, "exists", save_during_check)
+        assert temp_storage.document_exists(content_hash) is False
+
+        assert temp_storage.document_exists(content_hash) is True
+
+    def test_list_documents_tracks_saves_and_deletes(self, temp_storage):
+        """Listing should reflect documents saved and deleted through the storage."""
+        assert temp_storage.list_documents() == []
+
+        _save_empty_mindmap(temp_storage, "a1b2c3d4e5f67890", "one.pdf")
+        _save_empty_mindmap(temp_storage, "0987654321fedcba", "two.pdf")
+        assert {d.original_filename for d in temp_storage.list_documents()} == {"one.pdf", "two.pdf"}
+
+        temp_storage.delete_document("a1b2c3d4e5f67890")
+        assert [d.original_filename for d in temp_storage.list_documents()] == ["two.pdf"]
+
+
+class TestListDocuments:
+    """Tests for listing documents from their mindmap headers."""
+
+    def test_nodes_are_not_parsed(self, temp_storage):
+        """Listing should only need the fields written before the nodes."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash, 'say "hi"\\.pdf')
+        mindmap_path = temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME
+        raw = mindmap_path.read_bytes()
+        mindmap_path.write_bytes(raw[:raw.index(b'"nodes":')] + b'"nodes": [not json')
+
+        [info] = temp_storage.list_documents()
+
+        assert info.original_filename == 'say "hi"\\.pdf'
+        assert info.document_id == "doc-id"
+        assert info.page_count == 1
+
+    def test_nodes_before_header_fields_are_parsed_in_full(self, temp_storage):
+        """Files with nodes ahead of the timestamps should still list fully."""
+        folder = temp_storage.documents_dir / "a1b2c3d4e5f67890"
+        folder.mkdir()
+        (folder / temp_storage.MINDMAP_FILENAME).write_text(json.dumps({
+            "version": "1.0",
+            "document_id": "doc-id",
+            "content_hash": "a1b2c3d4e5f67890",
+            "original_filename": "old.pdf",
+            "page_count": 2,
+            "root_node_id": "root",
+            "nodes": [{"id": "root"}],
+            "created_at": "2024-01-01T00:00:00",
+            "last_modified": "2024-01-02T00:00:00",
+        }, indent=2))
+
+        [info] = temp_storage.list_documents()
+
+        assert info.original_filename == "old.pdf"
+        assert info.last_modified == "2024-01-02T00:00:00"
+
+    def test_many_documents_sorted_newest_first(self, temp_storage, monkeypatch):
+        """Headers read in parallel should still be listed newest first."""
+        monkeypatch.setattr(temp_storage, "LIST_DOCUMENTS_WORKERS", 4)
+        hashes = [f"{i:016x}" for i in range(10)]
+        for content_hash in hashes:
+            _save_empty_mindmap(temp_storage, content_hash, f"{content_hash}.pdf")
+
+        documents = temp_storage.list_documents()
+
+        assert [d.content_hash for d in documents] == hashes[::-1]
+
+    def test_listing_pool_is_reused_until_close(self, temp_storage):
+        """Cache misses should share one pool, which close() shuts down."""
+        _save_empty_mindmap(temp_storage, "a1b2c3d4e5f67890")
+        _save_empty_mindmap(temp_storage, "b1b2c3d4e5f67890")
+        temp_storage.list_documents()
+        pool = temp_storage._list_executor
+
+        _save_empty_mindmap(temp_storage, "c1b2c3d4e5f67890")
+        assert len(temp_storage.list_documents()) == 3
+        assert temp_storage._list_executor is pool
+
+        temp_storage.close()
+        assert temp_storage._list_executor is None
+        assert pool._shutdown
+
+    def test_skips_files_and_folders_without_mindmap(self, temp_storage):
+        """Only folders containing a mindmap should be listed."""
+        _save_empty_mindmap(temp_storage, "a1b2c3d4e5f67890")
+        (temp_storage.documents_dir / "0987654321fedcba").mkdir()
+        (temp_storage.documents_dir / "stray.txt").write_text("x")
+
+        assert [d.content_hash for d in temp_storage.list_documents()] == ["a1b2c3d4e5f67890"]
+
+
+class TestLoadMindmap:
+    """Tests for loading persisted mindmaps."""
+
+    def test_last_modified_dt_is_parsed(self, temp_storage):
+        """last_modified_dt should be the parsed last_modified timestamp."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+
+        mindmap = temp_storage.load_mindmap(content_hash)
+
+        assert mindmap.last_modified_dt.isoformat() == mindmap.last_modified
+        assert mindmap.last_modified_dt is mindmap.last_modified_dt
+
+    def test_invalid_json_returns_none(self, temp_storage):
+        """A mindmap that doesn't parse should load as None."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        mindmap_path = temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME
+        mindmap_path.write_bytes(b'{"version": "1.0",')
+
+        assert temp_storage.load_mindmap(content_hash) is None
+
+
+class TestNowIso:
+    """Tests for the timestamp formatter."""
+
+    def test_matches_utcnow_isoformat(self):
+        """Timestamps should parse back to the current UTC time."""
+        before = datetime.utcnow()
+        stamp = _now_iso()
+        after = datetime.utcnow()
+
+        assert len(stamp) == len("2024-01-01T00:00:00.000000")
+        parsed = datetime.fromisoformat(stamp)
+        assert before - timedelta(milliseconds=1) <= parsed <= after + timedelta(milliseconds=1)
+
+
+class TestMindmapCache:
+    """Tests for reusing loaded mindmaps while the file is unchanged."""
+
+    def test_unchanged_file_is_not_reparsed(self, temp_storage):
+        """Loading an unchanged mindmap should return the cached object."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+
+        first = temp_storage.load_mindmap(content_hash)
+
+        assert temp_storage.load_mindmap(content_hash) is first
+
+    def test_changed_file_is_reloaded(self, temp_storage):
+        """A mindmap rewritten behind the storage's back should be parsed again."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        first = temp_storage.load_mindmap(content_hash)
+
+        mindmap_path = temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME
+        data = json.loads(mindmap_path.read_text())
+        data["original_filename"] = "renamed.pdf"
+        mindmap_path.write_text(json.dumps(data))
+
+        reloaded = temp_storage.load_mindmap(content_hash)
+        assert reloaded is not first
+        assert reloaded.original_filename == "renamed.pdf"
+
+    def test_update_does_not_change_loaded_mindmap(self, temp_storage):
+        """Updating should cache a new mindmap rather than mutate a shared one."""
+        content_hash = "a1b2c3d4e5f67890"
+        root = MindMapNode(document_id="doc-id", title="Root", summary="Sum", node_type=NodeType.ROOT, depth=0)
+        temp_storage.save_mindmap(content_hash, "doc-id", "doc.pdf", 1, root.id, [root])
+        before = temp_storage.load_mindmap(content_hash)
+        before.last_modified_dt
+
+        temp_storage.update_mindmap_nodes(content_hash, [root.model_copy(update={"title": "Renamed"})])
+
+        after = temp_storage.load_mindmap(content_hash)
+        assert before.nodes[0]["title"] == "Root"
+        assert after.nodes[0]["title"] == "Renamed"
+        assert after.last_modified_dt.isoformat() == after.last_modified
+
+    def test_least_recently_used_mindmap_is_dropped(self, temp_storage, monkeypatch):
+        """The cache should hold at most MINDMAP_CACHE_SIZE mindmaps."""
+        monkeypatch.setattr(temp_storage, "MINDMAP_CACHE_SIZE", 2)
+        hashes = ["a1b2c3d4e5f67890", "b1b2c3d4e5f67890", "c1b2c3d4e5f67890"]
+        for content_hash in hashes:
+            _save_empty_mindmap(temp_storage, content_hash)
+
+        assert list(temp_storage._mindmap_cache) == hashes[1:]
+
+    def test_delete_drops_cached_mindmap(self, temp_storage):
+        """Deleting a document should drop its cached mindmap."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+
+        temp_storage.delete_document(content_hash)
+
+        assert temp_storage.load_mindmap(content_hash) is None
+        assert content_hash not in temp_storage._mindmap_cache
+
+
+class TestSaveMindmap:
+    """Tests for writing mindmaps and audit entries."""
+
+    def test_saved_nodes_round_trip(self, temp_storage):
+        """Saved nodes should load back unchanged from indented JSON."""
+        content_hash = "a1b2c3d4e5f67890"
+        root = MindMapNode(document_id="doc-id", title="Root", summary="Sum", node_type=NodeType.ROOT, depth=0)
+        child = MindMapNode(
+            document_id="doc-id", parent_id=root.id, title="Child", summary="Sum",
+            node_type=NodeType.SECTION, depth=1, key_concepts=["café"],
+        )
+        root.children_ids.append(child.id)
+
+        temp_storage.save_mindmap(content_hash, "doc-id", "doc.pdf", 1, root.id, [root, child])
+
+        raw = (temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME).read_text()
+        assert raw.startswith('{\n  "version": "1.0"')
+        mindmap = temp_storage.load_mindmap(content_hash)
+        assert [MindMapNode(**n) for n in mindmap.nodes] == [root, child]
+
+    def test_update_replaces_matching_nodes(self, temp_storage):
+        """Updated nodes should replace saved nodes with the same ID."""
+        content_hash = "a1b2c3d4e5f67890"
+        root = MindMapNode(document_id="doc-id", title="Root", summary="Sum", node_type=NodeType.ROOT, depth=0)
+        temp_storage.save_mindmap(content_hash, "doc-id", "doc.pdf", 1, root.id, [root])
+
+        renamed = root.model_copy(update={"title": "Renamed"})
+        assert temp_storage.update_mindmap_nodes(content_hash, [renamed]) is True
+
+        mindmap = temp_storage.load_mindmap(content_hash)
+        assert [n["title"] for n in mindmap.nodes] == ["Renamed"]
+
+    def test_failed_write_keeps_previous_mindmap(self, temp_storage, monkeypatch):
+        """A write that fails part way should leave the saved mindmap intact."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        folder = temp_storage.documents_dir / content_hash
+
+        def failing_fsync(fd):
+            raise OSError("disk full")
+
+        monkeypatch.setattr("app.services.storage.os.fsync", failing_fsync)
+        with pytest.raises(OSError):
+            _save_empty_mindmap(temp_storage, content_hash, "new.pdf")
+
+        assert temp_storage.load_mindmap(content_hash).original_filename == "doc.pdf"
+        assert sorted(p.name for p in folder.iterdir()) == ["audit.log", "mindmap.json"]
+
+    def test_update_merges_new_and_existing_nodes(self, temp_storage):
+        """Replaced nodes should keep their position and new nodes go at the end."""
+        content_hash = "a1b2c3d4e5f67890"
+        first, second = (
+            MindMapNode(document_id="doc-id", title=title, summary="Sum", node_type=NodeType.SECTION, depth=1)
+            for title in ("First", "Second")
+        )
+        temp_storage.save_mindmap(content_hash, "doc-id", "doc.pdf", 1, first.id, [first, second])
+        added = MindMapNode(document_id="doc-id", title="Added", summary="Sum", node_type=NodeType.SECTION, depth=1)
+
+        temp_storage.update_mindmap_nodes(content_hash, [added, first.model_copy(update={"title": "First v2"})])
+
+        mindmap = temp_storage.load_mindmap(content_hash)
+        assert [n["title"] for n in mindmap.nodes] == ["First v2", "Second", "Added"]
+
+    def test_update_keeps_file_layout(self, temp_storage):
+        """An updated file should have the same fields and order as a saved one."""
+        content_hash = "a1b2c3d4e5f67890"
+        root = MindMapNode(document_id="doc-id", title="Root", summary="Sum", node_type=NodeType.ROOT, depth=0)
+        temp_storage.save_mindmap(content_hash, "doc-id", "doc.pdf", 1, root.id, [root])
+        mindmap_path = temp_storage.documents_dir / content_hash / temp_storage.MINDMAP_FILENAME
+        saved = json.loads(mindmap_path.read_text())
+
+        temp_storage.update_mindmap_nodes(content_hash, [root.model_copy(update={"title": "Renamed"})])
+
+        updated = json.loads(mindmap_path.read_text())
+        assert list(updated) == list(saved)
+        assert PersistedMindMap.model_validate(updated).nodes[0]["title"] == "Renamed"
+
+    def test_save_after_delete_recreates_folder(self, temp_storage):
+        """Saving again after a delete should create the folder again."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        temp_storage.delete_document(content_hash)
+
+        _save_empty_mindmap(temp_storage, content_hash)
+
+        assert temp_storage.load_mindmap(content_hash) is not None
+
+    async def test_asave_writes_off_the_event_loop(self, temp_storage, monkeypatch):
+        """asave_mindmap should save in a worker thread."""
+        save_mindmap = temp_storage.save_mindmap
+        threads = []
+
+        def recording_save(**kwargs):
+            threads.append(threading.get_ident())
+            save_mindmap(**kwargs)
+
+        monkeypatch.setattr(temp_storage, "save_mindmap", recording_save)
+        await temp_storage.asave_mindmap("a1b2c3d4e5f67890", "doc-id", "doc.pdf", 1, "root", [])
+
+        assert threads and threads[0] != threading.get_ident()
+        assert temp_storage.load_mindmap("a1b2c3d4e5f67890").original_filename == "doc.pdf"
+
+    def test_update_missing_mindmap_fails(self, temp_storage):
+        """Updating a document without a mindmap should return False."""
+        assert temp_storage.update_mindmap_nodes("a1b2c3d4e5f67890", []) is False
+
+    def test_audit_entries_are_appended(self, temp_storage):
+        """Each storage action should append one audit entry."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        temp_storage.load_mindmap(content_hash)
+
+        actions = [entry.action for entry in temp_storage.get_audit_log(content_hash)]
+
+        assert actions == ["mindmap_loaded", "mindmap_saved"]
+
+    def test_audit_entries_are_buffered_until_flush(self, temp_storage):
+        """Entries from reads should reach disk on the next flush, in order."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        audit_path = temp_storage.documents_dir / content_hash / temp_storage.AUDIT_FILENAME
+        saved = audit_path.read_bytes()
+
+        temp_storage.load_mindmap(content_hash)
+        temp_storage.load_mindmap(content_hash)
+        assert audit_path.read_bytes() == saved
+
+        temp_storage.flush_audit()
+        lines = audit_path.read_bytes().splitlines()
+        assert len(lines) == 3
+        assert all(b'"mindmap_loaded"' in line for line in lines[1:])
+
+    def test_reading_audit_log_flushes_only_that_document(self, temp_storage):
+        """A buffered load should show up in that document's audit log."""
+        first, second = "a1b2c3d4e5f67890", "b1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, first)
+        _save_empty_mindmap(temp_storage, second)
+        temp_storage.load_mindmap(first)
+        temp_storage.load_mindmap(second)
+
+        actions = [entry.action for entry in temp_storage.get_audit_log(first)]
+
+        assert actions == ["mindmap_loaded", "mindmap_saved"]
+        assert second in temp_storage._audit_buffers
+        assert first not in temp_storage._audit_buffers
+
+
+class TestAuditLogLimit:
+    """Tests for reading only the newest audit entries."""
+
+    @pytest.fixture
+    def logged(self, temp_storage):
+        """A document with one save followed by nine loads."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        for _ in range(9):
+            temp_storage.load_mindmap(content_hash)
+        return content_hash
+
+    @pytest.mark.parametrize("block_size", [7, 64, 64 * 1024])
+    def test_limit_returns_newest_entries(self, temp_storage, logged, monkeypatch, block_size):
+        """A limit should return the same entries as the head of the full log."""
+        monkeypatch.setattr(temp_storage, "AUDIT_READ_BLOCK_SIZE", block_size)
+        full = temp_storage.get_audit_log(logged)
+
+        assert temp_storage.get_audit_log(logged, limit=3) == full[:3]
+        assert temp_storage.get_audit_log(logged, limit=10) == full
+        assert temp_storage.get_audit_log(logged, limit=50) == full
+
+    def test_limit_on_missing_log(self, temp_storage):
+        """A document without an audit log should have no entries."""
+        assert temp_storage.get_audit_log("a1b2c3d4e5f67890", limit=5) == []
+
+
+class TestAuditFiles:
+    """Tests for the open audit log handles."""
+
+    def test_audit_file_is_reused(self, temp_storage):
+        """Later writes should reuse the document's open audit log."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        f = temp_storage._audit_files[content_hash]
+
+        temp_storage.update_mindmap_nodes(content_hash, [])
+
+        assert temp_storage._audit_files[content_hash] is f
+        assert len(temp_storage.get_audit_log(content_hash)) == 3
+
+    def test_least_recently_used_file_is_closed(self, temp_storage, monkeypatch):
+        """Opening more than MAX_OPEN_AUDIT_FILES should close the oldest."""
+        monkeypatch.setattr(temp_storage, "MAX_OPEN_AUDIT_FILES", 2)
+        hashes = ["a1b2c3d4e5f67890", "b1b2c3d4e5f67890", "c1b2c3d4e5f67890"]
+        for content_hash in hashes:
+            _save_empty_mindmap(temp_storage, content_hash)
+
+        assert list(temp_storage._audit_files) == hashes[1:]
+
+        temp_storage.load_mindmap(hashes[0])
+        assert len(temp_storage.get_audit_log(hashes[0])) == 2
+
+    def test_delete_closes_audit_file(self, temp_storage):
+        """Deleting a document should close its audit log."""
+        content_hash = "a1b2c3d4e5f67890"
+        _save_empty_mindmap(temp_storage, content_hash)
+        f = temp_storage._audit_files[content_hash]
+
+        assert temp_storage.delete_document(content_hash) is True
+
+        assert f.closed
+        assert content_hash not in temp_storage._audit_files
+
+
+class TestCreateDocumentFolder:
+    """Tests for storing a document's PDF."""
+
+    def test_copies_pdf_from_path(self, temp_storage, tmp_path):
+        """The source PDF should be copied into the document folder."""
+        source = tmp_path / "upload.pdf"
+        source.write_bytes(b"%PDF-1.4 from path")
+
+        folder = temp_storage.create_document_folder("a1b2c3d4e5f67890", source)
+
+        dest = folder / temp_storage.PDF_FILENAME
+        assert dest.read_bytes() == b"%PDF-1.4 from path"
+        assert not dest.samefile(source)
+
+    def test_writes_pdf_from_fileobj(self, temp_storage):
+        """The PDF should be written from an open file object."""
+        source = io.BytesIO(b"%PDF-1.4 from fileobj")
+
+        folder = temp_storage.create_document_folder_from_fileobj("a1b2c3d4e5f67890", source)
+
+        assert (folder / temp_storage.PDF_FILENAME).read_bytes() == b"%PDF-1.4 from fileobj"
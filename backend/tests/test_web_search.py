@@ -0,0 +1,111 @@
+"""
+Tests for the web search service.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import search
+from app.services.web_search import WebSearchService
+
+
+class _FakeMessages:
+    """Stand-in for client.messages that returns one search result."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        result = SimpleNamespace(
+            type="web_search_result", title="Result", url="https://example.com", page_age=None
+        )
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="web_search_tool_result", content=[result])]
+        )
+
+
+def _service():
+    """Create a WebSearchService backed by a fake client."""
+    service = WebSearchService()
+    service.client = SimpleNamespace(messages=_FakeMessages())
+    return service
+
+
+class TestSearch:
+    """Tests for WebSearchService.search."""
+
+    async def test_parses_results(self):
+        """Search results should be returned as title/url/snippet dicts."""
+        service = _service()
+
+        results = await service.search("query")
+
+        assert results == [{"title": "Result", "url": "https://example.com", "snippet": ""}]
+
+    async def test_citations_fill_snippets(self):
+        """Cited text should become the snippet of the first result with that URL."""
+        service = _service()
+        found = [
+            SimpleNamespace(type="web_search_result", title=title, url=url, page_age="1 day")
+            for title, url in [("A", "https://a.example"), ("B", "https://b.example"), ("A2", "https://a.example")]
+        ]
+        citations = [
+            SimpleNamespace(type="web_search_result_location", url="https://a.example", cited_text="Cited A"),
+            SimpleNamespace(type="web_search_result_location", url="https://missing.example", cited_text="Lost"),
+        ]
+        response = SimpleNamespace(content=[
+            SimpleNamespace(type="web_search_tool_result", content=found),
+            SimpleNamespace(type="text", citations=citations),
+        ])
+
+        async def create(**kwargs):
+            return response
+
+        service.client.messages.create = create
+        results = await service.search("query")
+
+        assert [r["snippet"] for r in results] == ["Cited A", "1 day", "1 day"]
+
+    async def test_concurrent_identical_searches_share_one_call(self):
+        """Concurrent searches for the same query should send one request."""
+        service = _service()
+
+        results = await asyncio.gather(*(service.search("query") for _ in range(4)))
+
+        assert all(r == results[0] for r in results)
+        assert service.client.messages.calls == 1
+        assert service._inflight == {}
+
+    async def test_different_queries_are_not_shared(self):
+        """Different queries should each send their own request."""
+        service = _service()
+
+        await asyncio.gather(service.search("one"), service.search("two"))
+
+        assert service.client.messages.calls == 2
+
+
+class TestSearchRoute:
+    """Tests for the web search endpoint."""
+
+    def test_returns_results(self, monkeypatch):
+        """Results from the service should be returned with the query."""
+        async def fake_search(query, max_results):
+            return [{"title": "Result", "url": "https://example.com", "snippet": "Snippet"}]
+
+        monkeypatch.setattr(search.search_service, "search", fake_search)
+        app = FastAPI()
+        app.include_router(search.router, prefix="/search")
+
+        response = TestClient(app).post("/search/web", json={"query": "topic"})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "query": "topic",
+            "results": [{"title": "Result", "url": "https://example.com", "snippet": "Snippet"}],
+        }